@@ -0,0 +1,142 @@
+import base64
+import zlib
+
+import numpy as np
+
+# An episode is deterministic given its course seed(s) and the jump decisions of
+# the dinosaurs, so recording the ticks at which every dinosaur started a jump
+# is enough to replay it exactly (game.replay_generation), at any speed and
+# without the networks. Jumps can only start on the ground, so there are a few
+# per obstacle at most, and the ticks are stored as varint deltas, compressed.
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, position):
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def zigzag(value):
+    # Maps signed to unsigned: 0, -1, 1, -2... to 0, 1, 2, 3...
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def pack(genome_ids, jumps):
+    # Genome ids as signed deltas (they are mostly consecutive), then for every
+    # row its number of jumps and the gaps between its jump ticks
+    out = bytearray()
+    previous = 0
+    for genome_id in genome_ids:
+        write_varint(out, zigzag(genome_id - previous))
+        previous = genome_id
+    for ticks in jumps:
+        write_varint(out, len(ticks))
+        previous = -1
+        for tick in ticks:
+            write_varint(out, tick - previous - 1)
+            previous = tick
+    return base64.b64encode(zlib.compress(bytes(out), 9)).decode('ascii')
+
+
+def unpack(text, size, rows):
+    data = zlib.decompress(base64.b64decode(text))
+    position = 0
+    genome_ids = []
+    previous = 0
+    for _ in range(size):
+        delta, position = read_varint(data, position)
+        previous += unzigzag(delta)
+        genome_ids.append(previous)
+    jumps = []
+    for _ in range(rows):
+        count, position = read_varint(data, position)
+        ticks = []
+        previous = -1
+        for _ in range(count):
+            gap, position = read_varint(data, position)
+            previous += gap + 1
+            ticks.append(previous)
+        jumps.append(ticks)
+    return genome_ids, jumps
+
+
+class ActionLog:
+    # The jump ticks of every dinosaur of one episode. Rows are ordered like the
+    # DinoPopulation of the episode: course c, genome i is row c * size + i.
+    # ticks is the length of the episode, so a replay ends where it ended, also
+    # when a budget stopped it.
+    def __init__(self, seed, courses, aggregate, ticks, genome_ids, jumps):
+        self.seed = seed
+        self.courses = courses
+        self.aggregate = aggregate
+        self.ticks = ticks
+        self.genome_ids = list(genome_ids)
+        self.jumps = jumps
+
+    @property
+    def size(self):
+        return len(self.genome_ids)
+
+    @staticmethod
+    def from_events(seed, courses, aggregate, ticks, genome_ids, events):
+        # events is a list of (tick, rows) with the rows that jumped at tick
+        jumps = [[] for _ in range(len(genome_ids) * courses)]
+        for tick, rows in events:
+            for row in rows.tolist():
+                jumps[row].append(tick)
+        return ActionLog(seed, courses, aggregate, ticks, genome_ids, jumps)
+
+    @staticmethod
+    def merge(logs):
+        # One log of the episodes of several chunks of a population, played on
+        # the same courses (e.g. by ParallelEvaluator workers). The merged episode
+        # lasts as long as the longest one; only a wall-time budget can stop
+        # chunks at different ticks with dinosaurs still alive.
+        first = logs[0]
+        jumps = [ticks
+                 for course in range(first.courses)
+                 for log in logs
+                 for ticks in log.jumps[course * log.size:(course + 1) * log.size]]
+        return ActionLog(first.seed, first.courses, first.aggregate,
+                         max(log.ticks for log in logs),
+                         [genome_id for log in logs for genome_id in log.genome_ids], jumps)
+
+    def jumps_by_tick(self):
+        # {tick: rows that jump at tick}, for replaying
+        events = {}
+        for row, ticks in enumerate(self.jumps):
+            for tick in ticks:
+                events.setdefault(tick, []).append(row)
+        return {tick: np.array(rows) for tick, rows in events.items()}
+
+    def to_dict(self):
+        return {
+            'seed': self.seed,
+            'courses': self.courses,
+            'aggregate': self.aggregate,
+            'ticks': self.ticks,
+            'size': self.size,
+            'jumps': pack(self.genome_ids, self.jumps),
+        }
+
+    @staticmethod
+    def from_dict(data):
+        genome_ids, jumps = unpack(data['jumps'], data['size'], data['size'] * data['courses'])
+        return ActionLog(data['seed'], data['courses'], data['aggregate'], data['ticks'],
+                         genome_ids, jumps)
@@ -0,0 +1,145 @@
+import numpy as np
+from neat.graphs import feed_forward_layers
+
+# NumPy versions of the activation functions in neat.activations
+ACTIVATIONS = {
+    'sigmoid': lambda z: 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0))),
+    'tanh': lambda z: np.tanh(np.clip(2.5 * z, -60.0, 60.0)),
+    'sin': lambda z: np.sin(np.clip(5.0 * z, -60.0, 60.0)),
+    'gauss': lambda z: np.exp(-5.0 * np.clip(z, -3.4, 3.4) ** 2),
+    'relu': lambda z: np.where(z > 0.0, z, 0.0),
+    'softplus': lambda z: 0.2 * np.log(1 + np.exp(np.clip(5.0 * z, -60.0, 60.0))),
+    'identity': lambda z: z,
+    'clamped': lambda z: np.clip(z, -1.0, 1.0),
+    'exp': lambda z: np.exp(np.clip(z, -60.0, 60.0)),
+    'abs': lambda z: np.abs(z),
+    'hat': lambda z: np.maximum(0.0, 1 - np.abs(z)),
+    'square': lambda z: z ** 2,
+    'cube': lambda z: z ** 3,
+}
+ACTIVATION_NAMES = list(ACTIVATIONS)
+
+
+def compile_genome(genome, config):
+    # Same node selection and ordering as neat.nn.FeedForwardNetwork.create,
+    # returns the layers as lists of (node, activation, bias, response, links)
+    genome_config = config.genome_config
+    connections = [cg.key for cg in genome.connections.values() if cg.enabled]
+    layers = feed_forward_layers(genome_config.input_keys, genome_config.output_keys, connections)
+
+    compiled = []
+    for layer in layers:
+        nodes = []
+        for node in layer:
+            links = [(inode, genome.connections[(inode, onode)].weight)
+                     for inode, onode in connections if onode == node]
+            ng = genome.nodes[node]
+            if ng.aggregation != 'sum':
+                raise ValueError(f"BatchNetwork only supports 'sum' aggregation, got {ng.aggregation!r}")
+            if ng.activation not in ACTIVATIONS:
+                raise ValueError(f"BatchNetwork does not support the {ng.activation!r} activation")
+            nodes.append((node, ng.activation, ng.bias, ng.response, links))
+        compiled.append(nodes)
+    return compiled
+
+
+class BatchNetwork:
+    # Feed-forward networks of a whole generation packed into padded tensors.
+    # Every network gets a row of node values: the inputs, then the outputs, then
+    # its hidden nodes, plus one scratch column that absorbs padded layer entries.
+    def __init__(self, size, num_inputs, num_outputs, num_slots, layers):
+        self.size = size
+        self.num_inputs = num_inputs
+        self.num_outputs = num_outputs
+        self.num_slots = num_slots
+        self.layers = layers
+
+    def __len__(self):
+        return self.size
+
+    def activate(self, inputs, rows=None):
+        # inputs has shape (len(rows), num_inputs); returns (len(rows), num_outputs)
+        inputs = np.asarray(inputs, dtype=np.float64)
+        values = np.zeros((inputs.shape[0], self.num_slots + 1))
+        values[:, :self.num_inputs] = inputs
+        index = np.arange(inputs.shape[0])[:, None]
+
+        for weights, bias, response, activation, targets in self.layers:
+            if rows is not None:
+                weights, bias, response = weights[rows], bias[rows], response[rows]
+                activation, targets = activation[rows], targets[rows]
+            z = bias + response * np.einsum('ns,nsk->nk', values[:, :self.num_slots], weights)
+            out = np.zeros_like(z)
+            for act_id in np.unique(activation):
+                mask = activation == act_id
+                out[mask] = ACTIVATIONS[ACTIVATION_NAMES[act_id]](z[mask])
+            values[index, targets] = out
+
+        return values[:, self.num_inputs:self.num_inputs + self.num_outputs]
+
+    def activate_all(self, inputs):
+        # Every network on every row of inputs, without copying the weights per
+        # row: inputs has shape (m, num_inputs), the result (size, m, num_outputs)
+        inputs = np.asarray(inputs, dtype=np.float64)
+        m = inputs.shape[0]
+        values = np.zeros((self.size, m, self.num_slots + 1))
+        values[:, :, :self.num_inputs] = inputs
+        index = np.arange(self.size)[:, None]
+
+        for weights, bias, response, activation, targets in self.layers:
+            z = bias[:, None] + response[:, None] * np.einsum(
+                'nms,nsk->nmk', values[:, :, :self.num_slots], weights)
+            out = np.zeros_like(z)
+            for act_id in np.unique(activation):
+                mask = np.broadcast_to((activation == act_id)[:, None], z.shape)
+                out[mask] = ACTIVATIONS[ACTIVATION_NAMES[act_id]](z[mask])
+            values[index, :, targets] = out.transpose(0, 2, 1)
+
+        return values[:, :, self.num_inputs:self.num_inputs + self.num_outputs]
+
+    @staticmethod
+    def create(genomes, config):
+        # genomes is a list of genome objects in population order
+        genome_config = config.genome_config
+        num_inputs = len(genome_config.input_keys)
+        num_outputs = len(genome_config.output_keys)
+        compiled = [compile_genome(genome, config) for genome in genomes]
+
+        # Assign every node a column in its network's row of values
+        slots = []
+        num_slots = num_inputs + num_outputs
+        for layers in compiled:
+            slot = {key: i for i, key in enumerate(genome_config.input_keys)}
+            slot.update({key: num_inputs + i for i, key in enumerate(genome_config.output_keys)})
+            for layer in layers:
+                for node, *_ in layer:
+                    if node not in slot:
+                        slot[node] = len(slot)
+            slots.append(slot)
+            num_slots = max(num_slots, len(slot))
+
+        n = len(genomes)
+        depth = max((len(layers) for layers in compiled), default=0)
+        layers = []
+        for depth_index in range(depth):
+            width = max(len(c[depth_index]) for c in compiled if len(c) > depth_index)
+            weights = np.zeros((n, num_slots, width))
+            bias = np.zeros((n, width))
+            response = np.zeros((n, width))
+            activation = np.zeros((n, width), dtype=np.int64)
+            targets = np.full((n, width), num_slots, dtype=np.int64)
+
+            for row, layers_of_genome in enumerate(compiled):
+                if len(layers_of_genome) <= depth_index:
+                    continue
+                slot = slots[row]
+                for k, (node, act, node_bias, node_response, links) in enumerate(layers_of_genome[depth_index]):
+                    for inode, weight in links:
+                        weights[row, slot[inode], k] += weight
+                    bias[row, k] = node_bias
+                    response[row, k] = node_response
+                    activation[row, k] = ACTIVATION_NAMES.index(act)
+                    targets[row, k] = slot[node]
+            layers.append((weights, bias, response, activation, targets))
+
+        return BatchNetwork(n, num_inputs, num_outputs, num_slots, layers)
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import neat
+import numpy as np
+
+from constants import DINO_Y_POS
+from game import GameState, play_generation
+from runstore import RunStore, genome_record, top_records
+
+# Headless, fixed-seed benchmarks of the simulation and of training. Every size
+# starts from the same random seed, so two commits are measured on exactly the
+# same genomes and courses; compare their JSON results with --compare.
+POP_SIZES = (100, 1000, 10000)
+COURSE_SEEDS = (0, 1, 2)
+GENERATIONS = 3
+TOP_K = 100
+RESULTS_DIR = "bench_results"
+
+
+def make_config(config_path, pop_size):
+    config = neat.config.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        config_path
+    )
+    config.pop_size = pop_size
+    return config
+
+
+def make_genomes(config, seed):
+    random.seed(seed)
+    return list(neat.Population(config).population.items())
+
+
+def count_work(gen_pool, config, seed):
+    # Replays an episode (untimed) to count the work done in it. Every live
+    # dinosaur is tested against every obstacle on screen, and activates its
+    # network when there is at least one obstacle and it is on the ground.
+    counts = {'activations': 0, 'collision_checks': 0}
+    alive = [len(gen_pool)]
+
+    def on_tick(snapshot):
+        counts['collision_checks'] += alive[0] * len(snapshot.obstacles)
+        if snapshot.obstacles:
+            counts['activations'] += int(np.count_nonzero(snapshot.y == DINO_Y_POS))
+        alive[0] = snapshot.alive
+
+    play_generation(gen_pool, config, seed, on_tick)
+    return counts
+
+
+def bench_episodes(config, genomes, seeds, skip_idle=False):
+    # The genomes keep their fitness on the first course
+    gen_pool = [genome for _, genome in genomes]
+    ticks = activations = collision_checks = 0
+    seconds = 0.0
+    for seed in seeds:
+        start = time.perf_counter()
+        fitnesses = play_generation(gen_pool, config, seed, skip_idle=skip_idle)
+        seconds += time.perf_counter() - start
+        if seed == seeds[0]:
+            for genome, fitness in zip(gen_pool, fitnesses):
+                genome.fitness = fitness
+        ticks += GameState.ticks
+        counts = count_work(gen_pool, config, seed)
+        activations += counts['activations']
+        collision_checks += counts['collision_checks']
+    return {
+        'episodes': len(seeds),
+        'ticks': ticks,
+        'seconds': seconds,
+        'ticks_per_sec': ticks / seconds,
+        'activations_per_sec': activations / seconds,
+        'collision_checks_per_sec': collision_checks / seconds,
+    }
+
+
+def bench_persistence(genomes, top_k=0, repeats=3):
+    # What save_generation_data costs: the record snapshot taken on the training
+    # thread, and the write done by the RunStore thread (waited for here).
+    # top_k > 0 measures saving only the fittest genomes, as with --top-k.
+    snapshot = write = 0.0
+    with tempfile.TemporaryDirectory() as directory:
+        store = RunStore(directory)
+        for generation in range(repeats):
+            start = time.perf_counter()
+            if top_k > 0:
+                records = top_records(genomes, top_k)
+                store.save_generation(generation, records,
+                                      [genome.fitness for _, genome in genomes])
+            else:
+                records = [genome_record(genome_id, genome) for genome_id, genome in genomes]
+                store.save_generation(generation, records)
+            middle = time.perf_counter()
+            store.flush()
+            snapshot += middle - start
+            write += time.perf_counter() - middle
+        store.close()
+        size = os.path.getsize(os.path.join(directory, "genomes.jsonl"))
+    return {
+        'generations': repeats,
+        'snapshot_ms': 1000 * snapshot / repeats,
+        'write_ms': 1000 * write / repeats,
+        'bytes_per_generation': size // repeats,
+        'genomes_per_sec': len(genomes) * repeats / (snapshot + write),
+    }
+
+
+def bench_training(config, seed, generations, skip_idle=False):
+    # Full NEAT generations (evaluation, speciation and reproduction), without
+    # drawing or persistence
+    random.seed(seed)
+    population = neat.Population(config)
+
+    def eval_genomes(genomes, config):
+        fitnesses = play_generation([genome for _, genome in genomes], config,
+                                    random.randrange(2**32), skip_idle=skip_idle)
+        for (_, genome), fitness in zip(genomes, fitnesses):
+            genome.fitness = fitness
+
+    start = time.perf_counter()
+    population.run(eval_genomes, generations)
+    seconds = time.perf_counter() - start
+    return {
+        'generations': generations,
+        'seconds': seconds,
+        'generations_per_min': 60 * generations / seconds,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(config_path, sizes=POP_SIZES, seeds=COURSE_SEEDS, generations=GENERATIONS,
+                   seed=0, skip_idle=False):
+    results = {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'neat': getattr(neat, '__version__', 'unknown'),
+        'machine': platform.machine(),
+        'course_seeds': list(seeds),
+        'seed': seed,
+        'skip_idle': skip_idle,
+        'sizes': {},
+    }
+    for pop_size in sizes:
+        print(f"pop_size {pop_size}")
+        config = make_config(config_path, pop_size)
+        genomes = make_genomes(config, seed)
+        result = {
+            'episodes': bench_episodes(config, genomes, seeds, skip_idle),
+            'persistence': bench_persistence(genomes),
+            'persistence_top_k': bench_persistence(genomes, TOP_K),
+        }
+        if generations > 0:
+            result['training'] = bench_training(config, seed, generations, skip_idle)
+        results['sizes'][str(pop_size)] = result
+        for group, values in result.items():
+            print(f"  {group}: " + ", ".join(f"{key}={value:.4g}" for key, value in values.items()))
+    return results
+
+
+def flatten(results):
+    return {
+        f"{pop_size}/{group}/{key}": value
+        for pop_size, result in results['sizes'].items()
+        for group, values in result.items()
+        for key, value in values.items()
+    }
+
+
+def compare(results, baseline):
+    # Prints every metric next to the baseline's. Throughput metrics are better
+    # when higher, times (seconds, *_ms) when lower.
+    print(f"\n{baseline['commit']} -> {results['commit']}")
+    old = flatten(baseline)
+    for name, value in flatten(results).items():
+        if name not in old or not old[name]:
+            continue
+        print(f"  {name:45} {old[name]:12.4g} {value:12.4g} {value / old[name]:7.2f}x")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the dinosaur simulation and training")
+    parser.add_argument("--sizes", type=int, nargs="+", default=POP_SIZES,
+                        help="population sizes to benchmark")
+    parser.add_argument("--course-seeds", type=int, nargs="+", default=COURSE_SEEDS,
+                        help="courses played by every population")
+    parser.add_argument("--generations", type=int, default=GENERATIONS,
+                        help="NEAT generations timed per size (0 = skip training)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for the initial genomes and the training runs")
+    parser.add_argument("--skip-idle", action="store_true",
+                        help="fast-forward idle ticks, as with main.py --skip-idle")
+    parser.add_argument("--output", default=None,
+                        help=f"JSON file for the results (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", default=None,
+                        help="JSON results of an earlier run to compare against")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    local_dir = os.path.dirname(__file__)
+    config_path = os.path.join(local_dir, 'config.txt')
+
+    results = run_benchmarks(config_path, args.sizes, args.course_seeds, args.generations,
+                             args.seed, args.skip_idle)
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to '{output}'")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
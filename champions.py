@@ -0,0 +1,119 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+import neat
+import numpy as np
+
+import runstore
+from constants import SAVE_DIR
+from course import SMALL
+from game import Budget, GameState, play_generation
+from parallel import split
+
+# Headless evaluation of the best saved genomes: every champion plays the same
+# seeded courses (all champions together in one episode per course), in a pool
+# of worker processes, and gets a distribution of scores instead of the single
+# game test.py shows.
+NUM_COURSES = 1000
+MAX_TICKS = 10000  # A champion that survives this long counts as surviving the course
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def cause_name(code):
+    # Inverse of game.Obstacle.code
+    kind, cactus_type = divmod(code, 3)
+    return f"{'SmallCactus' if kind == SMALL else 'LargeCactus'}{cactus_type + 1}"
+
+
+def load_config(config_path):
+    return neat.config.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        config_path
+    )
+
+
+def play_courses(genomes, config, seeds, max_ticks):
+    # Runs in a worker process. Returns the score of every genome on every seed,
+    # shape (len(seeds), len(genomes)), and the obstacle code that ended each
+    # run (-1 when the genome survived max_ticks).
+    scores = np.zeros((len(seeds), len(genomes)), dtype=np.int64)
+    causes = np.full((len(seeds), len(genomes)), -1, dtype=np.int64)
+    for i, seed in enumerate(seeds):
+        play_generation(genomes, config, seed, budget=Budget(max_ticks=max_ticks), skip_idle=True)
+        dinosaurs = GameState.dinosaurs
+        scores[i] = np.where(dinosaurs.alive, GameState.points, dinosaurs.died_at)
+        causes[i] = dinosaurs.cause
+    return scores, causes
+
+
+def evaluate_champions(config, champions, seeds, workers=1, max_ticks=MAX_TICKS):
+    # champions is a list of (generation, record); returns the score and cause
+    # arrays of play_courses over all seeds
+    genomes = [runstore.genome_from_record(record) for _, record in champions]
+    chunks = split(list(seeds), max(1, workers) * 4)
+    jobs = [(genomes, config, chunk, max_ticks) for chunk in chunks]
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.starmap(play_courses, jobs)
+    else:
+        results = [play_courses(*job) for job in jobs]
+    return (np.concatenate([scores for scores, _ in results]),
+            np.concatenate([causes for _, causes in results]))
+
+
+def report(champions, scores, causes, max_ticks=MAX_TICKS):
+    print(f"\n{len(champions)} champions on {scores.shape[0]} courses (max {max_ticks} ticks)")
+    for i, (generation, record) in enumerate(champions):
+        score = scores[:, i]
+        percentiles = np.percentile(score, PERCENTILES)
+        survived = np.count_nonzero(causes[:, i] < 0)
+        print(f"\nGenome {record['genome_id']} (generation {generation}, "
+              f"training fitness {record['fitness']:.1f})")
+        print(f"  score: mean {score.mean():.1f}, std {score.std():.1f}, "
+              f"min {score.min()}, max {score.max()}")
+        print("  percentiles: " + ", ".join(
+            f"p{p} {value:.0f}" for p, value in zip(PERCENTILES, percentiles)))
+        print(f"  survived: {survived} ({100 * survived / len(score):.1f}%)")
+        codes, counts = np.unique(causes[:, i][causes[:, i] >= 0], return_counts=True)
+        if len(codes):
+            print("  failures: " + ", ".join(
+                f"{cause_name(code)} {count}" for code, count in
+                sorted(zip(codes.tolist(), counts.tolist()), key=lambda item: -item[1])))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate the best saved dinosaurs on many courses")
+    parser.add_argument("--top", type=int, default=5,
+                        help="number of champions (best distinct genomes of the run)")
+    parser.add_argument("--courses", type=int, default=NUM_COURSES,
+                        help="seeded courses every champion plays")
+    parser.add_argument("--first-seed", type=int, default=0,
+                        help="seed of the first course; the courses use consecutive seeds")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS,
+                        help="end a course after this many ticks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes")
+    parser.add_argument("--save-dir", default=SAVE_DIR,
+                        help="run directory written by main.py")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    local_dir = os.path.dirname(__file__)
+    config = load_config(os.path.join(local_dir, 'config.txt'))
+
+    champions = runstore.load_top(args.save_dir, args.top)
+    if not champions:
+        raise SystemExit("No generations data available. Train the AI first.")
+
+    start = time.perf_counter()
+    seeds = range(args.first_seed, args.first_seed + args.courses)
+    scores, causes = evaluate_champions(config, champions, seeds, args.workers, args.max_ticks)
+    report(champions, scores, causes, args.max_ticks)
+    print(f"\nEvaluated in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,100 @@
+import os
+import pickle
+import random
+import threading
+import zlib
+from itertools import count
+
+import neat
+from neat.reporting import BaseReporter, ReporterSet
+
+
+def peek(counter):
+    # Reads the next value of an itertools.count without consuming it
+    value = next(counter)
+    return value, count(value)
+
+
+class Checkpointer(BaseReporter):
+    # Saves the NEAT population, species, reproduction counters, random state and
+    # the caller's own bookkeeping (extra_state() must return something picklable)
+    # every `every` generations. The state is pickled at the end of the generation;
+    # compressing and writing it happen on a background thread. Only the latest
+    # checkpoint is kept, replaced atomically.
+    def __init__(self, population, path, every=10, extra_state=None):
+        self.population = population
+        self.path = path
+        self.every = every
+        self.extra_state = extra_state
+        self.generation = None
+        self.thread = None
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def end_generation(self, config, population, species_set):
+        # NEAT calls this after producing the next generation, so resuming starts
+        # at generation + 1
+        if self.every <= 0 or (self.generation + 1) % self.every != 0:
+            return
+        self.save(self.generation + 1, population, species_set)
+
+    def save(self, generation, population, species_set):
+        reproduction = self.population.reproduction
+        genome_config = self.population.config.genome_config
+        next_genome_key, reproduction.genome_indexer = peek(reproduction.genome_indexer)
+        next_species_key, species_set.indexer = peek(species_set.indexer)
+        next_node_key = None
+        if genome_config.node_indexer is not None:
+            next_node_key, genome_config.node_indexer = peek(genome_config.node_indexer)
+        state = {
+            'generation': generation,
+            'population': population,
+            'species': species_set.species,
+            'genome_to_species': species_set.genome_to_species,
+            'next_genome_key': next_genome_key,
+            'next_species_key': next_species_key,
+            'next_node_key': next_node_key,
+            'random_state': random.getstate(),
+            'extra': self.extra_state() if self.extra_state else None,
+        }
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.wait()
+        self.thread = threading.Thread(target=self._write, args=(data,), name="Checkpointer")
+        self.thread.start()
+
+    def wait(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _write(self, data):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(zlib.compress(data, 1))
+        os.replace(temp_path, self.path)
+
+
+def restore_checkpoint(path, config):
+    # Returns a neat.Population that continues where the checkpoint left off,
+    # and the extra state that was saved with it
+    with open(path, 'rb') as f:
+        state = pickle.loads(zlib.decompress(f.read()))
+
+    species_set = config.species_set_type(config.species_set_config, ReporterSet())
+    species_set.species = state['species']
+    species_set.genome_to_species = state['genome_to_species']
+    species_set.indexer = count(state['next_species_key'])
+
+    population = neat.Population(config, (state['population'], species_set, state['generation']))
+    population.reproduction.genome_indexer = count(state['next_genome_key'])
+    if state['next_node_key'] is not None:
+        config.genome_config.node_indexer = count(state['next_node_key'])
+    species_set.reporters = population.reporters
+
+    random.setstate(state['random_state'])
+    return population, state['extra']
@@ -0,0 +1,275 @@
+import argparse
+import json
+import os
+import select
+import socket
+import struct
+import tempfile
+import time
+import zlib
+from collections import deque
+
+import neat
+
+from actionlog import ActionLog
+from game import Budget, evaluate_chunk
+from parallel import ParallelEvaluator, split
+
+# Evaluation across several hosts. main.py --coordinator listens on a TCP port;
+# workers (python cluster.py HOST:PORT) connect to it, receive config.txt, then
+# play chunks of genomes with game.evaluate_chunk and send back the fitness
+# values. Messages are zlib-compressed JSON, prefixed with their length.
+# Genomes travel in a compact form (pack_genome) and workers may join or leave
+# at any time: the chunk of a worker that disconnects or times out goes to the
+# next idle one, so a generation only fails if no worker is left and none joins.
+
+HEADER = struct.Struct('>I')
+DEFAULT_PORT = 5712
+
+
+def parse_address(text, default_host=''):
+    # "HOST:PORT", "PORT" or "HOST" -> (host, port)
+    host, _, port = text.rpartition(':')
+    if not port.isdigit():
+        host, port = text, DEFAULT_PORT
+    return host or default_host, int(port)
+
+
+def send_message(sock, message):
+    data = zlib.compress(json.dumps(message, separators=(',', ':')).encode('utf-8'))
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def receive_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def receive_message(sock):
+    size, = HEADER.unpack(receive_exactly(sock, HEADER.size))
+    return json.loads(zlib.decompress(receive_exactly(sock, size)))
+
+
+def pack_genome(genome):
+    # Only what the network is built from, in the genome's own order (which the
+    # network's summation order follows): nodes and enabled connections
+    return [
+        genome.key,
+        [[node_id, node.bias, node.response, node.activation, node.aggregation]
+         for node_id, node in genome.nodes.items()],
+        [[key[0], key[1], connection.weight]
+         for key, connection in genome.connections.items() if connection.enabled],
+    ]
+
+
+def unpack_genome(data):
+    key, nodes, connections = data
+    genome = neat.DefaultGenome(key)
+    for node_id, bias, response, activation, aggregation in nodes:
+        node = genome.nodes[node_id] = neat.genome.DefaultNodeGene(node_id)
+        node.bias, node.response = bias, response
+        node.activation, node.aggregation = activation, aggregation
+    for in_node, out_node, weight in connections:
+        connection = genome.connections[in_node, out_node] = \
+            neat.genome.DefaultConnectionGene((in_node, out_node))
+        connection.weight = weight
+        connection.enabled = True
+    return genome
+
+
+def load_config_text(text):
+    # neat.Config only reads files
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write(text)
+    try:
+        return neat.config.Config(
+            neat.DefaultGenome,
+            neat.DefaultReproduction,
+            neat.DefaultSpeciesSet,
+            neat.DefaultStagnation,
+            f.name
+        )
+    finally:
+        os.remove(f.name)
+
+
+class RemoteWorker:
+    def __init__(self, sock, name):
+        self.sock = sock
+        self.name = name
+        self.job = None  # Index of the chunk being played
+        self.deadline = None
+
+
+class RemoteEvaluator:
+    # Same interface as parallel.ParallelEvaluator (evaluate_chunk being the
+    # chunk function), with one chunk per connected worker. The config passed
+    # to evaluate is not sent: workers load config_path's text once, when they
+    # connect. A worker that does not answer within timeout seconds is dropped.
+    def __init__(self, address, config_path, timeout=None):
+        self.server = socket.create_server(address)
+        self.address = self.server.getsockname()[:2]
+        with open(config_path) as f:
+            self.config_text = f.read()
+        self.timeout = timeout
+        self.workers = []
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        if self.server is None:
+            return
+        for worker in self.workers:
+            try:
+                send_message(worker.sock, {'stop': True})
+            except OSError:
+                pass
+            worker.sock.close()
+        self.workers = []
+        self.server.close()
+        self.server = None
+
+    def accept(self):
+        sock, peer = self.server.accept()
+        try:
+            sock.settimeout(10)
+            hello = receive_message(sock)
+            send_message(sock, {'config': self.config_text})
+            sock.settimeout(None)
+        except (OSError, ValueError, zlib.error):
+            sock.close()
+            return
+        worker = RemoteWorker(sock, f"{hello.get('name', '?')} ({peer[0]}:{peer[1]})")
+        self.workers.append(worker)
+        print(f"Worker {worker.name} joined ({len(self.workers)} connected)")
+
+    def drop(self, worker, pending, reason):
+        worker.sock.close()
+        self.workers.remove(worker)
+        print(f"Lost worker {worker.name}: {reason}")
+        if worker.job is not None:
+            pending.appendleft(worker.job)
+
+    def map_chunks(self, genomes, config, *args):
+        # Chunk results in order, as returned by evaluate_chunk
+        while not self.workers:
+            print(f"Waiting for workers on {self.address[0]}:{self.address[1]}...")
+            self.accept()
+        chunks = split(genomes, len(self.workers))
+        packed = [[pack_genome(genome) for genome in chunk] for chunk in chunks]
+        pending = deque(range(len(chunks)))
+        results = {}
+
+        while len(results) < len(chunks):
+            for worker in list(self.workers):
+                if worker.job is None and pending:
+                    job = pending.popleft()
+                    worker.job = job
+                    try:
+                        send_message(worker.sock, {'job': job, 'genomes': packed[job], 'args': args})
+                    except OSError as error:
+                        self.drop(worker, pending, error)
+                        continue
+                    if self.timeout:
+                        worker.deadline = time.monotonic() + self.timeout
+
+            busy = {worker.sock: worker for worker in self.workers if worker.job is not None}
+            deadlines = [worker.deadline for worker in busy.values() if worker.deadline]
+            wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            if not busy and pending:
+                print(f"No workers left, waiting on {self.address[0]}:{self.address[1]}...")
+            readable, _, _ = select.select([self.server] + list(busy), [], [], wait)
+
+            for sock in readable:
+                if sock is self.server:
+                    self.accept()
+                    continue
+                worker = busy[sock]
+                try:
+                    message = receive_message(sock)
+                except (OSError, ValueError, zlib.error) as error:
+                    self.drop(worker, pending, error)
+                    continue
+                if 'actions' in message:
+                    results[message['job']] = (message['fitnesses'],
+                                               ActionLog.from_dict(message['actions']))
+                else:
+                    results[message['job']] = message['fitnesses']
+                worker.job = worker.deadline = None
+
+            now = time.monotonic()
+            for worker in [worker for worker in busy.values() if worker in self.workers]:
+                if worker.deadline and worker.deadline <= now and worker.job is not None:
+                    self.drop(worker, pending, f"no answer within {self.timeout}s")
+
+        return [results[job] for job in range(len(chunks))]
+
+    def evaluate(self, genomes, config, *args):
+        fitnesses = []
+        for chunk_fitnesses in self.map_chunks(genomes, config, *args):
+            fitnesses.extend(chunk_fitnesses)
+        return fitnesses
+
+
+def play_job(message, config, evaluator=None):
+    # Plays a chunk sent by the coordinator, in this process or split again
+    # across the local evaluator's processes
+    genomes = [unpack_genome(data) for data in message['genomes']]
+    args = list(message['args'])
+    if args[1] is not None:
+        args[1] = Budget(*args[1])  # evaluate_chunk's budget, sent as a list
+    record_actions = len(args) > 6 and args[6]  # evaluate_chunk's record_actions
+    if evaluator is None:
+        result = evaluate_chunk(genomes, config, *args)
+        results = [result]
+    else:
+        results = evaluator.map_chunks(genomes, config, *args)
+    if not record_actions:
+        return {'job': message['job'],
+                'fitnesses': [fitness for fitnesses in results for fitness in fitnesses]}
+    return {
+        'job': message['job'],
+        'fitnesses': [fitness for fitnesses, _ in results for fitness in fitnesses],
+        'actions': ActionLog.merge([log for _, log in results]).to_dict(),
+    }
+
+
+def run_worker(address, processes=0):
+    sock = socket.create_connection(address)
+    send_message(sock, {'name': f"{socket.gethostname()}/{os.getpid()}"})
+    config = load_config_text(receive_message(sock)['config'])
+    evaluator = ParallelEvaluator(processes, evaluate_chunk) if processes > 1 else None
+    print(f"Connected to {address[0]}:{address[1]}")
+    try:
+        while True:
+            try:
+                message = receive_message(sock)
+            except ConnectionError:
+                print("Coordinator closed the connection")
+                break
+            if message.get('stop'):
+                break
+            send_message(sock, play_job(message, config, evaluator))
+    finally:
+        sock.close()
+        if evaluator is not None:
+            evaluator.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate genomes for a main.py --coordinator run")
+    parser.add_argument("coordinator", help=f"HOST:PORT of the coordinator (default port {DEFAULT_PORT})")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="split every chunk across this many local processes (0 = this process)")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    run_worker(parse_address(args.coordinator, 'localhost'), args.processes)
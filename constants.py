@@ -0,0 +1,33 @@
+# Game constants shared by the simulation, the renderer and the training code
+SCREEN_WIDTH, SCREEN_HEIGHT = 1200, 900
+FPS = 30
+DINO_X_POS, DINO_Y_POS = 80, 310
+JUMP_VELOCITY = 8.5
+BACKGROUND_Y = 380
+INITIAL_GAME_SPEED = 20
+NUMBER_OF_GENERATIONS = 500
+SAVE_DIR = "dino_saves"
+
+# (width, height) of every sprite in Assets/, so the simulation never has to load
+# an image to know its hitboxes
+SPRITE_SIZES = {
+    "Dino/DinoRun1.png": (87, 94),
+    "Dino/DinoRun2.png": (88, 94),
+    "Dino/DinoJump.png": (88, 94),
+    "Cactus/SmallCactus1.png": (34, 71),
+    "Cactus/SmallCactus2.png": (68, 71),
+    "Cactus/SmallCactus3.png": (105, 71),
+    "Cactus/LargeCactus1.png": (48, 95),
+    "Cactus/LargeCactus2.png": (99, 95),
+    "Cactus/LargeCactus3.png": (102, 95),
+    "Other/Track.png": (2404, 28),
+}
+
+# Hitbox of a dinosaur (size of DinoRun1.png, the rect never changes afterwards)
+DINO_WIDTH, DINO_HEIGHT = SPRITE_SIZES["Dino/DinoRun1.png"]
+TRACK_WIDTH = SPRITE_SIZES["Other/Track.png"][0]
+
+# Obstacle sprites (width, height) by cactus type, and the y position of each kind
+SMALL_CACTUS_SIZES = tuple(SPRITE_SIZES[f"Cactus/SmallCactus{i}.png"] for i in range(1, 4))
+LARGE_CACTUS_SIZES = tuple(SPRITE_SIZES[f"Cactus/LargeCactus{i}.png"] for i in range(1, 4))
+SMALL_CACTUS_Y, LARGE_CACTUS_Y = 325, 300
@@ -0,0 +1,82 @@
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+from constants import (
+    SCREEN_WIDTH, FPS, INITIAL_GAME_SPEED, SMALL_CACTUS_SIZES, LARGE_CACTUS_SIZES,
+)
+
+SMALL, LARGE = 0, 1
+SPAWN_COOLDOWN = 2000  # ms
+MAX_OBSTACLES = 3
+
+# One spawn event: `kind` is SMALL or LARGE and `types` holds the cactus type
+# (0-2) of every obstacle added at `tick`
+Spawn = namedtuple('Spawn', ['tick', 'kind', 'types'])
+
+
+def game_speed_at(tick):
+    # The score goes up by one per tick and the speed by one every 100 points
+    return INITIAL_GAME_SPEED + tick // 100
+
+
+def obstacle_width(kind, cactus_type):
+    sizes = SMALL_CACTUS_SIZES if kind == SMALL else LARGE_CACTUS_SIZES
+    return sizes[cactus_type][0]
+
+
+class Course:
+    # Seeded, tick-indexed obstacle schedule. The schedule only depends on the seed
+    # and the tick count, never on wall-clock time or on the dinosaurs, so a course
+    # can be replayed exactly at any simulation speed and in any process.
+    # Spawns are generated lazily, as far as they have been asked for.
+    def __init__(self, seed):
+        self.seed = seed
+        self.spawns = {}
+        self.order = []  # The same spawns, in tick order
+        self._rng = random.Random(seed)
+        self._tick = 0  # First tick not generated yet
+        self._obstacles = []  # [x, width] of obstacles on screen while generating
+        self._last_spawn_time = 0
+
+    def spawn_at(self, tick):
+        while self._tick <= tick:
+            self._step()
+        return self.spawns.get(tick)
+
+    def spawn(self, index):
+        # The index-th spawn of the course (0 = the first), to walk the
+        # schedule without testing every tick
+        while len(self.order) <= index:
+            self._step()
+        return self.order[index]
+
+    def spawns_until(self, tick):
+        # All spawns before the given tick, in order
+        self.spawn_at(tick - 1)
+        return [spawn for t, spawn in sorted(self.spawns.items()) if t < tick]
+
+    def _step(self):
+        # Mirrors the order of the game loop: spawn, then move obstacles left
+        tick = self._tick
+        current_time = tick * 1000 // FPS
+        rng = self._rng
+        if len(self._obstacles) < MAX_OBSTACLES and current_time - self._last_spawn_time + rng.randint(0, 1500) > SPAWN_COOLDOWN:
+            kind = SMALL if rng.randint(0, 1) == 0 else LARGE
+            types = tuple(rng.randint(0, 2) for _ in range(rng.randint(1, 3)))
+            self.spawns[tick] = Spawn(tick, kind, types)
+            self.order.append(self.spawns[tick])
+            self._obstacles.extend([SCREEN_WIDTH, obstacle_width(kind, t)] for t in types)
+            self._last_spawn_time = current_time
+
+        speed = game_speed_at(tick)
+        for obstacle in self._obstacles:
+            obstacle[0] -= speed
+        self._obstacles = [o for o in self._obstacles if not o[0] < -o[1]]
+        self._tick += 1
+
+
+@lru_cache(maxsize=32)
+def get_course(seed):
+    # Courses are shared, so all genomes evaluated on a seed reuse one schedule
+    return Course(seed)
@@ -0,0 +1,160 @@
+import numpy as np
+
+from constants import DINO_X_POS, DINO_Y_POS, DINO_WIDTH, DINO_HEIGHT, JUMP_VELOCITY
+
+# Sprite indices stored per dinosaur: 0 and 1 are the running frames
+JUMPING_SPRITE = 2
+
+
+def to_pixels(values):
+    # pygame.Rect rounds half away from zero when a float is assigned to it
+    return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(np.int64)
+
+
+def jump_trajectory():
+    # Every jump starts on the ground with the same velocity, so all jumps follow
+    # the same path. y and jump_vel after each update of a jump, the last entry
+    # being the landing (where jump_vel is reset to JUMP_VELOCITY).
+    y, jump_vel = [DINO_Y_POS], [JUMP_VELOCITY]
+    while jump_vel[-1] > -JUMP_VELOCITY:
+        y.append(int(to_pixels(np.float64(y[-1] - jump_vel[-1] * 4))))
+        jump_vel.append(jump_vel[-1] - 0.8)
+    return np.array(y, dtype=np.int64), np.array(jump_vel)
+
+JUMP_Y, JUMP_VEL = jump_trajectory()
+JUMP_TICKS = len(JUMP_Y) - 1  # Updates from the start of a jump to the landing
+
+
+class DinoPopulation:
+    # Struct-of-arrays replacement for a list of Dinosaur objects.
+    # Index i is the dinosaur of the i-th genome of the generation.
+    def __init__(self, size):
+        self.size = size
+        self.y = np.full(size, DINO_Y_POS, dtype=np.int64)
+        self.jump_vel = np.full(size, JUMP_VELOCITY, dtype=np.float64)
+        self.dino_run = np.ones(size, dtype=bool)
+        self.dino_jump = np.zeros(size, dtype=bool)
+        self.step_index = np.zeros(size, dtype=np.int64)
+        self.sprite = np.zeros(size, dtype=np.int8)
+        self.alive = np.ones(size, dtype=bool)
+        self.fitness = np.zeros(size, dtype=np.float64)
+        self.died_at = np.full(size, -1, dtype=np.int64)  # Tick of the fatal collision
+        self.cause = np.full(size, -1, dtype=np.int64)  # Code of the obstacle that was hit
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))
+
+    def alive_indices(self):
+        return np.flatnonzero(self.alive)
+
+    def update(self, active=None):
+        # Same arithmetic as Dinosaur.update(), run()/jump() for every live dinosaur at once
+        # (or every live dinosaur of the mask active)
+        alive = self.alive if active is None else self.alive & active
+        running = alive & self.dino_run
+        self.sprite = np.where(running, self.step_index // 5, self.sprite).astype(np.int8)
+        self.y = np.where(running, DINO_Y_POS, self.y)
+        self.step_index += running
+
+        jumping = alive & self.dino_jump
+        self.sprite[jumping] = JUMPING_SPRITE
+        self.y = np.where(jumping, to_pixels(self.y - self.jump_vel * 4), self.y)
+        self.jump_vel = np.where(jumping, self.jump_vel - 0.8, self.jump_vel)
+
+        landed = jumping & (self.jump_vel <= -JUMP_VELOCITY)
+        self.dino_jump &= ~landed
+        self.dino_run |= landed
+        self.jump_vel[landed] = JUMP_VELOCITY
+
+        self.step_index[self.step_index >= 10] = 0
+
+    def advance(self, ticks):
+        # Same as calling update() `ticks` times without any jump or collision in
+        # between, computed at once from the jump trajectory and the run cycle
+        if ticks <= 0:
+            return
+        jumping = self.alive & self.dino_jump
+        phase = self.jump_phase()
+        landing = jumping & (phase + ticks >= JUMP_TICKS)
+        flying = jumping & ~landing
+        self.y[flying] = JUMP_Y[phase[flying] + ticks]
+        self.jump_vel[flying] = JUMP_VEL[phase[flying] + ticks]
+        self.sprite[jumping] = JUMPING_SPRITE
+
+        # Landed dinosaurs run for the remaining updates
+        run_ticks = np.where(landing, phase + ticks - JUMP_TICKS, 0)
+        self.y[landing] = JUMP_Y[-1]
+        self.jump_vel[landing] = JUMP_VELOCITY
+        self.dino_jump &= ~landing
+        self.dino_run |= landing
+        run_ticks[self.alive & self.dino_run & ~landing] = ticks
+
+        running = run_ticks > 0
+        steps = self.step_index[running] + run_ticks[running]
+        self.sprite[running] = ((steps - 1) % 10) // 5
+        self.y[running] = DINO_Y_POS
+        self.step_index[running] = steps % 10
+
+    def jump_phase(self):
+        # Updates done since the start of the jump, for jumping dinosaurs (0 elsewhere)
+        phase = np.searchsorted(-JUMP_VEL[:-1], -self.jump_vel)
+        return np.where(self.dino_jump, phase, 0)
+
+    def airborne_ticks(self):
+        # Upcoming ticks in which each dinosaur is in the air or landing, so its
+        # jump decisions are ignored (0 for dinosaurs on the ground)
+        return np.where(self.dino_jump, JUMP_TICKS - self.jump_phase(), 0)
+
+    def jump(self, decisions):
+        # decisions is a boolean mask; only dinosaurs standing on the ground can jump
+        start = decisions & self.alive & (self.y == DINO_Y_POS)
+        self.dino_jump |= start
+        self.dino_run &= ~start
+
+    def kill(self, index):
+        self.alive[index] = False
+
+    def collide(self, rect, penalty=1, rows=slice(None), tick=-1, cause=-1):
+        # rect is an obstacle (x, y, width, height), tested against the dinosaurs
+        # in the slice rows. Every dinosaur shares DINO_X_POS, so the x overlap is
+        # tested once and only the y overlap is resolved per dinosaur. Same strict
+        # comparisons as pygame.Rect.colliderect. The dinosaurs that are hit
+        # remember tick and cause.
+        x, y, width, height = rect
+        if not (DINO_X_POS < x + width and x < DINO_X_POS + DINO_WIDTH):
+            return 0
+        alive = self.alive[rows]  # Views, so the updates below reach the arrays
+        hit = alive & (self.y[rows] < y + height) & (y < self.y[rows] + DINO_HEIGHT)
+        self.fitness[rows][hit] -= penalty
+        self.died_at[rows][hit] = tick
+        self.cause[rows][hit] = cause
+        alive &= ~hit
+        return int(np.count_nonzero(hit))
+
+    def reward(self, amount, times=1):
+        # Adding amount one tick at a time, as the fitness values would be rounded
+        # after `times` separate rewards
+        if times == 1:
+            self.fitness[self.alive] += amount
+            return
+        # Live dinosaurs usually share one fitness value, so only the distinct
+        # values are summed up
+        values, inverse = np.unique(self.fitness[self.alive], return_inverse=True)
+        totals = []
+        for total in values.tolist():
+            for _ in range(times):
+                total += amount
+            totals.append(total)
+        self.fitness[self.alive] = np.array(totals)[inverse]
+
+    def sensors(self, target, rows):
+        # Network inputs of the game for the given dinosaurs: rect.y and the
+        # distance from the rect's top-left corner to target, one (x, y) point
+        # or a pair of arrays with one point per row
+        y = self.y[rows]
+        dx = DINO_X_POS - target[0]
+        dy = y - target[1]
+        return np.column_stack((y, np.sqrt(dx ** 2 + dy ** 2)))
+
+    def rect(self, index):
+        return (DINO_X_POS, int(self.y[index]), DINO_WIDTH, DINO_HEIGHT)
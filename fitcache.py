@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+
+def genome_structure(genome):
+    # Everything that determines a genome's network: its nodes and its enabled
+    # connections, sorted by key. Disabled connections are left out since the
+    # network never uses them.
+    nodes = tuple(sorted(
+        (key, node.bias, node.response, node.activation, node.aggregation)
+        for key, node in genome.nodes.items()))
+    connections = tuple(sorted(
+        (key, connection.weight)
+        for key, connection in genome.connections.items() if connection.enabled))
+    return nodes, connections
+
+
+class FitnessCache:
+    # LRU cache of fitness values keyed by the genome structure and everything
+    # else the episode depends on (course seed, courses, budget...). Episodes are
+    # deterministic and genomes do not interact, so a genome that was already
+    # evaluated under the same key gets the same fitness without playing.
+    # The structure itself is the key, so different genomes never collide.
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, genome, *episode):
+        return genome_structure(genome), episode
+
+    def get(self, key):
+        fitness = self.entries.get(key)
+        if fitness is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return fitness
+
+    def put(self, key, fitness):
+        self.entries[key] = fitness
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def evaluate(self, genomes, evaluate, *episode):
+        # Fitness of every genome, in order. evaluate(genomes) is only called for
+        # the genomes that are not cached, each distinct structure once.
+        keys = [self.key(genome, *episode) for genome in genomes]
+        fitnesses = [self.get(key) for key in keys]
+        missing = {}
+        for genome, key, fitness in zip(genomes, keys, fitnesses):
+            if fitness is None and key not in missing:
+                missing[key] = genome
+        if not missing:
+            return fitnesses
+        computed = dict(zip(missing, evaluate(list(missing.values()))))
+        for key, fitness in computed.items():
+            self.put(key, fitness)
+        return [computed[key] if fitness is None else fitness
+                for key, fitness in zip(keys, fitnesses)]
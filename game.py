@@ -0,0 +1,458 @@
+import os
+import time
+import random
+from collections import namedtuple
+
+import numpy as np
+
+from constants import (
+    SCREEN_WIDTH, INITIAL_GAME_SPEED, TRACK_WIDTH, DINO_X_POS, DINO_Y_POS, DINO_WIDTH,
+    SMALL_CACTUS_SIZES, LARGE_CACTUS_SIZES, SMALL_CACTUS_Y, LARGE_CACTUS_Y,
+)
+from engine import DinoPopulation
+from batchnet import BatchNetwork
+from lookup import DecisionTable
+from actionlog import ActionLog
+from course import Course, get_course, SMALL, LARGE
+
+# The game core: obstacles, game state and the NEAT episode loop. Nothing here
+# imports pygame or loads an image, so worker processes and display-less
+# servers can import it cheaply; drawing lives in render.py.
+
+# Headless mode can be enabled with DINO_HEADLESS=1 or the --headless flag
+HEADLESS = os.environ.get("DINO_HEADLESS", "0") == "1"
+RENDER_EVERY = int(os.environ.get("DINO_RENDER_EVERY", "0"))
+
+# Longest stretch of idle ticks fast-forwarded at once
+SKIP_HORIZON = 100
+
+# How the fitness of a genome over several courses is combined
+AGGREGATES = {
+    'mean': lambda fitness: fitness.mean(axis=0),
+    'min': lambda fitness: fitness.min(axis=0),
+}
+
+# Everything needed to draw one tick, detached from the live simulation state.
+# y, sprite and fitness only cover the live dinosaurs; obstacles holds
+# (kind, cactus_type, x, y) tuples.
+Snapshot = namedtuple('Snapshot', [
+    'tick', 'generation', 'points', 'game_speed', 'x_pos_bg', 'alive',
+    'y', 'sprite', 'fitness', 'obstacles',
+])
+
+class Budget(namedtuple('Budget', ['max_ticks', 'max_seconds', 'max_score'], defaults=(0, 0, 0))):
+    # Limits of a single episode (0 = no limit). An episode that reaches one ends
+    # early and the survivors keep the fitness earned so far, which is what they
+    # would have had at that tick anyway. Ticks and score are deterministic;
+    # wall time is not, and with --workers it is measured per worker.
+    def exceeded(self, deadline):
+        # Name of the limit that was reached, or None
+        if self.max_ticks and GameState.ticks >= self.max_ticks:
+            return 'max_ticks'
+        if self.max_score and GameState.points >= self.max_score:
+            return 'max_score'
+        if deadline is not None and time.perf_counter() >= deadline:
+            return 'max_seconds'
+        return None
+
+class Obstacle:
+    def __init__(self, sizes, number_of_cacti, y):
+        self.type = number_of_cacti
+        self.width, self.height = sizes[self.type]
+        self.x = SCREEN_WIDTH
+        self.y = y
+
+    @property
+    def rect(self):
+        return (self.x, self.y, self.width, self.height)
+
+    @property
+    def code(self):
+        # Identifies the obstacle kind and cactus type, e.g. as a cause of death
+        return self.kind * 3 + self.type
+
+    @property
+    def midtop(self):
+        return (self.x + self.width // 2, self.y)
+
+    def update(self, distance=None):
+        self.x -= GameState.game_speed if distance is None else distance
+        return self.x < -self.width  # Returns True if off-SCREEN
+
+class SmallCactus(Obstacle):
+    kind = SMALL
+
+    def __init__(self, number_of_cacti):
+        super().__init__(SMALL_CACTUS_SIZES, number_of_cacti, SMALL_CACTUS_Y)
+
+class LargeCactus(Obstacle):
+    kind = LARGE
+
+    def __init__(self, number_of_cacti):
+        super().__init__(LARGE_CACTUS_SIZES, number_of_cacti, LARGE_CACTUS_Y)
+
+def course_seeds(seed, count):
+    # Seeds of the courses played in one episode: the episode seed itself and
+    # seeds drawn from it, so every worker derives the same courses
+    if seed is None:
+        return [None] * count
+    generator = random.Random(seed)
+    return [seed] + [generator.randrange(2**32) for _ in range(count - 1)]
+
+class GameState:
+    obstacles = []  # Obstacles of the first course, the one that is drawn
+    dinosaurs = None  # DinoPopulation of the current generation
+    gen_pool = []
+    nets = None  # BatchNetwork with one network per genome of gen_pool
+    table = None  # DecisionTable of nets when deciding by lookup
+    validate_lookup = False  # With a table, also evaluate nets exactly and count the disagreements
+    lookup_checks = 0
+    lookup_disagreements = 0
+    points = 0
+    game_speed = INITIAL_GAME_SPEED
+    x_pos_bg = 0
+    course = None  # Obstacle schedule of the current generation (its first course)
+    lane_courses = []  # Every course played at once, each by a copy of the population
+    lane_obstacles = []
+    lane_size = 0  # Dinosaurs per course; course i is played by rows i*lane_size..
+    population = None
+    current_generation = 0
+    best_dinos = {}  # To store best dinos from each generation
+    store = None  # RunStore that persists every generation
+    ticks = 0  # Simulation frames since the start of the generation
+    headless = HEADLESS
+    render_every = RENDER_EVERY  # In headless mode, draw every Nth generation (0 = never)
+    budget = None  # Budget that bounds every episode (--max-ticks/--max-seconds/--max-score)
+    truncated = None  # Budget limit that ended the last episode, if any
+    num_courses = 1  # Courses every genome plays per generation (None = from config.txt)
+    skip_idle = False  # Fast-forward idle ticks (--skip-idle)
+    lookup = None  # Resolution of the decision tables, None = evaluate the networks (--lookup)
+    aggregate = 'mean'  # Key of AGGREGATES combining a genome's fitness over the courses
+    course_seed = None  # Seed of the course(s) played by every generation (None = new each time)
+    course_rng = None  # random.Random drawing the generations' course seeds (None = the random module)
+    fitness_cache_size = 0  # Entries of fitness_cache (0 = no cache)
+    fitness_cache = None  # FitnessCache of identical genomes on identical episodes
+    top_k = 0  # Only persist the K fittest genomes of each generation (0 = all, None = by pop_size)
+    evaluator = None  # ParallelEvaluator when training with --workers
+    snapshots = None  # SnapshotBuffer read by the viewer when training with --watch
+    viewer = None
+    profiler = None  # profiler.Profiler timing the phases of a generation (--profile)
+    record_actions = False  # Record the jumps of every episode in action_log (--record-actions)
+    jump_events = None  # (tick, rows) of every jump of the episode, while recording
+    action_log = None  # ActionLog of the last episode played while recording
+
+    @staticmethod
+    def reset(seed=None, courses=1):
+        GameState.lane_courses = [Course(s) if s is None else get_course(s)
+                                  for s in course_seeds(seed, courses)]
+        GameState.lane_obstacles = [[] for _ in range(courses)]
+        GameState.lane_size = 0
+        GameState.table = None
+        GameState.lookup_checks = 0
+        GameState.lookup_disagreements = 0
+        GameState.obstacles = GameState.lane_obstacles[0]
+        GameState.dinosaurs = None
+        GameState.gen_pool = []
+        GameState.nets = None
+        GameState.points = 0
+        GameState.game_speed = INITIAL_GAME_SPEED
+        GameState.x_pos_bg = 0
+        GameState.ticks = 0
+        GameState.jump_events = [] if GameState.record_actions else None
+        GameState.course = GameState.lane_courses[0]
+
+    @staticmethod
+    def checkpoint_state():
+        # Our own bookkeeping saved alongside the NEAT checkpoints
+        return {
+            'current_generation': GameState.current_generation,
+            'best_dinos': GameState.best_dinos,
+            'course_seed': GameState.course.seed if GameState.course else None,
+            'course_rng': GameState.course_rng.getstate() if GameState.course_rng else None,
+        }
+
+    @staticmethod
+    def restore_checkpoint_state(state):
+        GameState.current_generation = state['current_generation']
+        GameState.best_dinos = state['best_dinos']
+        if state.get('course_rng') is not None:
+            GameState.course_rng = random.Random()
+            GameState.course_rng.setstate(state['course_rng'])
+
+    @staticmethod
+    def should_render(generation):
+        if not GameState.headless:
+            return True
+        return GameState.render_every > 0 and generation % GameState.render_every == 0
+
+def update_score():
+    GameState.points += 1
+    if GameState.points % 100 == 0:
+        GameState.game_speed += 1
+
+def update_background():
+    if GameState.x_pos_bg <= -TRACK_WIDTH:
+        GameState.x_pos_bg = 0
+    GameState.x_pos_bg -= GameState.game_speed
+
+def spawn_obstacle():
+    for course, obstacles in zip(GameState.lane_courses, GameState.lane_obstacles):
+        spawn = course.spawn_at(GameState.ticks)
+        if spawn:
+            for cactus_type in spawn.types:
+                if spawn.kind == SMALL:
+                    obstacles.append(SmallCactus(cactus_type))
+                else:
+                    obstacles.append(LargeCactus(cactus_type))
+
+def update_obstacles(distance=None):
+    GameState.lane_obstacles = [[obstacle for obstacle in obstacles if not obstacle.update(distance)]
+                                for obstacles in GameState.lane_obstacles]
+    GameState.obstacles = GameState.lane_obstacles[0]
+
+def decide(dinosaurs):
+    # Every live dinosaur whose course has an obstacle on screen asks its network
+    # whether to jump, with the first obstacle of its own course as target
+    targets = [obstacles[0].midtop if obstacles else None for obstacles in GameState.lane_obstacles]
+    if not any(targets):
+        return
+    # Dinosaurs in the air cannot jump, so their networks are not asked
+    rows = dinosaurs.alive_indices()
+    rows = rows[dinosaurs.y[rows] == DINO_Y_POS]
+    lane = rows // GameState.lane_size
+    if not all(targets):
+        has_target = np.array([target is not None for target in targets])
+        rows, lane = rows[has_target[lane]], lane[has_target[lane]]
+    points = np.array([target or (0, 0) for target in targets]).T
+    inputs = dinosaurs.sensors(points[:, lane], rows)
+    networks = rows % GameState.lane_size
+    if GameState.table is not None:
+        jump = GameState.table.lookup(inputs[:, 1], networks)
+        if GameState.validate_lookup:
+            exact = GameState.nets.activate(inputs, networks)[:, 0] > 0.5
+            GameState.lookup_checks += len(rows)
+            GameState.lookup_disagreements += int(np.count_nonzero(jump != exact))
+    else:
+        jump = GameState.nets.activate(inputs, networks)[:, 0] > 0.5
+    decisions = np.zeros(dinosaurs.size, dtype=bool)
+    decisions[rows] = jump
+    dinosaurs.jump(decisions)
+    if GameState.jump_events is not None and jump.any():
+        GameState.jump_events.append((GameState.ticks, rows[jump]))
+
+def replay_decisions(jumps):
+    # decide() for replay_generation: the rows recorded at this tick jump.
+    # They were on the ground and alive when recorded, so they are again.
+    def decide(dinosaurs):
+        rows = jumps.get(GameState.ticks)
+        if rows is not None:
+            decisions = np.zeros(dinosaurs.size, dtype=bool)
+            decisions[rows] = True
+            dinosaurs.jump(decisions)
+    return decide
+
+def idle_ticks(dinosaurs, limit):
+    # Number of upcoming ticks (at most limit) in which nothing can happen but
+    # motion and rewards: no obstacle spawns, no obstacle overlaps the dinosaurs
+    # horizontally (so nothing can collide), and every live dinosaur on a course
+    # with obstacles is in the air or landing (so no network decision matters)
+    has_obstacles = [bool(obstacles) for obstacles in GameState.lane_obstacles]
+    if all(has_obstacles) and (dinosaurs.alive & dinosaurs.dino_run).any():
+        return 0  # The usual case, checked first because it is cheap
+    size = GameState.lane_size
+    alive = dinosaurs.alive.reshape(-1, size)
+    busy = np.array(has_obstacles) & alive.any(axis=1)
+    if busy.any():
+        if (alive[busy] & dinosaurs.dino_run.reshape(-1, size)[busy]).any():
+            return 0
+        airborne = dinosaurs.airborne_ticks().reshape(-1, size)[busy]
+        limit = min(limit, int(airborne[alive[busy]].min()))
+
+    for course in GameState.lane_courses:
+        for tick in range(GameState.ticks, GameState.ticks + limit):
+            if course.spawn_at(tick):
+                limit = tick - GameState.ticks
+                break
+
+    # Obstacle positions after each tick, with the speed going up every 100 points
+    obstacles = [obstacle for lane in np.flatnonzero(busy).tolist()
+                 for obstacle in GameState.lane_obstacles[lane]]
+    distance = 0
+    for tick in range(limit):
+        distance += GameState.game_speed + (GameState.points % 100 + tick) // 100
+        for obstacle in obstacles:
+            x = obstacle.x - distance
+            if DINO_X_POS < x + obstacle.width and x < DINO_X_POS + DINO_WIDTH:
+                return tick
+    return limit
+
+def fast_forward(dinosaurs, ticks):
+    # Plays `ticks` idle ticks (see idle_ticks) at once, with exactly the result
+    # of playing them one by one
+    dinosaurs.advance(ticks)
+    distance = 0
+    for _ in range(ticks):
+        distance += GameState.game_speed
+        update_score()
+        update_background()
+    update_obstacles(distance)
+    dinosaurs.reward(0.1, ticks)
+    GameState.ticks += ticks
+
+def take_snapshot():
+    # Only the first course and its dinosaurs are drawn
+    dinosaurs = GameState.dinosaurs
+    rows = dinosaurs.alive_indices()
+    rows = rows[rows < GameState.lane_size]
+    return Snapshot(
+        GameState.ticks, GameState.current_generation, GameState.points,
+        GameState.game_speed, GameState.x_pos_bg, len(rows),
+        dinosaurs.y[rows], dinosaurs.sprite[rows], dinosaurs.fitness[rows],
+        [(obstacle.kind, obstacle.type, obstacle.x, obstacle.y)
+         for obstacle in GameState.obstacles],
+    )
+
+def episode_limit(budget):
+    # Ticks that can be fast-forwarded before reaching a tick or score budget
+    limit = SKIP_HORIZON
+    if budget is not None and budget.max_ticks:
+        limit = min(limit, budget.max_ticks - GameState.ticks)
+    if budget is not None and budget.max_score:
+        limit = min(limit, budget.max_score - GameState.points)
+    return limit
+
+def run_episode(dinosaurs, decide, on_tick=None, budget=None, skip_idle=False):
+    # The tick loop: plays until every dinosaur is dead or budget is exceeded.
+    # decide(dinosaurs) makes the jump decisions of a tick.
+    skip_idle = skip_idle and on_tick is None
+    GameState.truncated = None
+    deadline = None
+    if budget is not None and budget.max_seconds:
+        deadline = time.perf_counter() + budget.max_seconds
+    profiler = GameState.profiler  # None unless profiling
+
+    while True:
+        if not len(dinosaurs):
+            break
+        if budget is not None:
+            GameState.truncated = budget.exceeded(deadline)
+            if GameState.truncated:
+                break
+        if profiler: t = profiler.clock()
+
+        if skip_idle:
+            idle = idle_ticks(dinosaurs, episode_limit(budget))
+            if profiler: t = profiler.lap('idle_check', t)
+            if idle > 0:
+                fast_forward(dinosaurs, idle)
+                if profiler: profiler.lap('skip', t)
+                continue
+
+        # Game logic
+        dinosaurs.update()
+        if profiler: t = profiler.lap('update', t)
+        
+        # Obstacle management
+        spawn_obstacle()
+        update_obstacles()
+        if profiler: t = profiler.lap('obstacles', t)
+        
+        for lane, obstacles in enumerate(GameState.lane_obstacles):
+            rows = slice(lane * GameState.lane_size, (lane + 1) * GameState.lane_size)
+            for obstacle in obstacles:
+                dinosaurs.collide(obstacle.rect, rows=rows, tick=GameState.ticks,
+                                  cause=obstacle.code)
+        if profiler: t = profiler.lap('collisions', t)
+        
+        # AI decision making
+        decide(dinosaurs)
+        if profiler: t = profiler.lap('activate', t)
+        
+        # Update fitness for surviving dinosaurs
+        dinosaurs.reward(0.1)
+        
+        update_score()
+        update_background()
+        GameState.ticks += 1
+        if profiler: t = profiler.lap('score', t)
+        
+        # Headless generations run as fast as possible, without a frame cap
+        if on_tick is not None:
+            on_tick(take_snapshot())
+            if profiler: profiler.lap('draw', t)
+
+def play_generation(gen_pool, config, seed, on_tick=None, budget=None, courses=1, aggregate='mean',
+                    skip_idle=False, lookup=None, validate_lookup=False):
+    # Plays one episode with every genome of gen_pool on the course given by seed
+    # and returns their fitness values in the same order. on_tick(snapshot) is
+    # called after every tick when something wants to draw the episode, and the
+    # episode stops early when it exceeds budget.
+    # With courses > 1 every genome also plays courses - 1 more courses derived
+    # from seed (common random numbers: the same ones for every genome), in the
+    # same episode: the population is copied once per course and runs through
+    # the same batched arrays and networks. The fitness values per course are
+    # combined with AGGREGATES[aggregate].
+    # skip_idle fast-forwards stretches of ticks in which nothing but motion can
+    # happen, with the same results; it is ignored while on_tick needs every tick.
+    # lookup=resolution decides by DecisionTable instead of evaluating the
+    # networks every tick; validate_lookup counts where the two would differ.
+    # With GameState.record_actions the episode is kept in GameState.action_log.
+    combine = AGGREGATES[aggregate]
+    GameState.reset(seed, courses)
+    
+    # Initialize NEAT population
+    GameState.lane_size = len(gen_pool)
+    GameState.dinosaurs = DinoPopulation(len(gen_pool) * courses)
+    GameState.gen_pool = list(gen_pool)
+    GameState.nets = BatchNetwork.create(GameState.gen_pool, config)
+    dinosaurs = GameState.dinosaurs
+    profiler = GameState.profiler
+    GameState.validate_lookup = validate_lookup
+    if lookup:
+        if profiler: t = profiler.clock()
+        GameState.table = DecisionTable(GameState.nets, lookup)
+        if profiler: profiler.lap('lookup_build', t)
+
+    run_episode(dinosaurs, decide, on_tick, budget, skip_idle)
+
+    if GameState.jump_events is not None:
+        GameState.action_log = ActionLog.from_events(
+            seed, courses, aggregate, GameState.ticks,
+            [genome.key for genome in GameState.gen_pool], GameState.jump_events)
+        GameState.jump_events = None
+    # Release the networks now rather than when the next generation replaces
+    # them, so two generations of compiled networks never coexist
+    GameState.gen_pool = []
+    GameState.nets = None
+    GameState.table = None
+    return combine(dinosaurs.fitness.reshape(courses, -1)).tolist()
+
+def replay_generation(log, on_tick=None, start=0):
+    # Plays a recorded episode (an ActionLog) again, without the networks, and
+    # returns the fitness values of its genomes, which match the recorded run.
+    # The first `start` ticks are fast-forwarded without calling on_tick, to
+    # draw the episode from any point; every tick is drawn from there on.
+    GameState.reset(log.seed, log.courses)
+    GameState.jump_events = None
+    GameState.lane_size = log.size
+    GameState.dinosaurs = DinoPopulation(log.size * log.courses)
+    dinosaurs = GameState.dinosaurs
+    decide = replay_decisions(log.jumps_by_tick())
+
+    if start > 0:
+        run_episode(dinosaurs, decide, budget=Budget(max_ticks=min(start, log.ticks)),
+                    skip_idle=True)
+    run_episode(dinosaurs, decide, on_tick, Budget(max_ticks=log.ticks), skip_idle=True)
+    return AGGREGATES[log.aggregate](dinosaurs.fitness.reshape(log.courses, -1)).tolist()
+
+def evaluate_chunk(gen_pool, config, seed, budget=None, courses=1, aggregate='mean',
+                   skip_idle=False, lookup=None, record_actions=False):
+    # Runs in a ParallelEvaluator worker process. With record_actions it returns
+    # the fitness values and the ActionLog of the chunk.
+    GameState.record_actions = record_actions
+    fitnesses = play_generation(gen_pool, config, seed, budget=budget, courses=courses,
+                                aggregate=aggregate, skip_idle=skip_idle, lookup=lookup)
+    if record_actions:
+        return fitnesses, GameState.action_log
+    return fitnesses
+
@@ -0,0 +1,35 @@
+import numpy as np
+
+from constants import SCREEN_WIDTH, DINO_Y_POS
+
+# Networks are only asked while their dinosaur is on the ground, so the y input
+# is always DINO_Y_POS and a decision only depends on the distance input, which
+# the screen bounds. Distances past MAX_DISTANCE use the last entry.
+MAX_DISTANCE = float(SCREEN_WIDTH)
+# Largest number of network evaluations done at once while building a table
+BUILD_CHUNK = 1 << 18
+
+
+class DecisionTable:
+    # Jump decisions of every network of a BatchNetwork, evaluated once per
+    # generation at distances 0, resolution, 2*resolution... up to MAX_DISTANCE.
+    # Looking a decision up is then a single array index per dinosaur; the
+    # decision of the nearest table distance is used, so a network whose output
+    # crosses 0.5 between two entries can decide differently from the exact
+    # evaluation (play_generation can count those with validate_lookup).
+    def __init__(self, nets, resolution=1.0):
+        self.resolution = resolution
+        self.distances = np.arange(0.0, MAX_DISTANCE + resolution, resolution)
+        self.jump = np.zeros((len(nets), len(self.distances)), dtype=bool)
+
+        inputs = np.column_stack((np.full(len(self.distances), DINO_Y_POS), self.distances))
+        per_chunk = max(1, BUILD_CHUNK // max(1, len(nets)))
+        for start in range(0, len(self.distances), per_chunk):
+            stop = start + per_chunk
+            self.jump[:, start:stop] = nets.activate_all(inputs[start:stop])[:, :, 0] > 0.5
+
+    def lookup(self, distance, rows):
+        # distance holds one input per row; rows index the networks
+        index = np.rint(np.asarray(distance) / self.resolution).astype(np.int64)
+        np.clip(index, 0, len(self.distances) - 1, out=index)
+        return self.jump[rows, index]
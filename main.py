@@ -1,331 +1,165 @@
-import pygame
 import os
 import random
-import math
 import sys
 import neat
-import json
+import argparse
+import configparser
 from datetime import datetime
 
-# Initialize pygame and load assets before anything else
-pygame.init()
+from constants import NUMBER_OF_GENERATIONS, SAVE_DIR
+from game import (
+    HEADLESS, RENDER_EVERY, AGGREGATES, Budget, GameState, play_generation, evaluate_chunk,
+)
+from parallel import ParallelEvaluator
+from cluster import RemoteEvaluator, parse_address
+from runstore import RunStore, genome_record, top_records, rollback
+from checkpoint import Checkpointer, restore_checkpoint
+from profiler import Profiler, ProfileReporter
+from fitcache import FitnessCache
+from actionlog import ActionLog
 
-# Constants
-SCREEN_WIDTH, SCREEN_HEIGHT = 1200, 900
-FPS = 30
-DINO_X_POS, DINO_Y_POS = 80, 310
-JUMP_VELOCITY = 8.5
-BACKGROUND_Y = 380
-INITIAL_GAME_SPEED = 20
-NUMBER_OF_GENERATIONS = 500
-SAVE_DIR = "dino_saves"
+# pygame is only imported (through render and viewer) when something is drawn,
+# so a headless run never loads it
 
-SCREEN = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+CHECKPOINT_PATH = os.path.join(SAVE_DIR, "checkpoint.pkl")
+CHECKPOINT_EVERY = 10
+# From this population size on, only the top genomes are saved unless --top-k says otherwise
+LARGE_POPULATION = 10000
+LARGE_POPULATION_TOP_K = 100
+PROFILE_PATH = os.path.join(SAVE_DIR, "profile.csv")
+FITNESS_CACHE_SIZE = 10000
 
-class Assets:
-    
-    @staticmethod
-    def load():
-        Assets.RUNNING = {
-            0: pygame.image.load(os.path.join("Assets/Dino", "DinoRun1.png")),
-            1: pygame.image.load(os.path.join("Assets/Dino", "DinoRun2.png"))
-        }
-        Assets.JUMPING = pygame.image.load(os.path.join("Assets/Dino", "DinoJump.png"))
-        Assets.SMALL_CACTUS = {
-            0: pygame.image.load(os.path.join("Assets/Cactus", "SmallCactus1.png")),
-            1: pygame.image.load(os.path.join("Assets/Cactus", "SmallCactus2.png")),
-            2: pygame.image.load(os.path.join("Assets/Cactus", "SmallCactus3.png"))
-        }
-        Assets.LARGE_CACTUS = {
-            0: pygame.image.load(os.path.join("Assets/Cactus", "LargeCactus1.png")),
-            1: pygame.image.load(os.path.join("Assets/Cactus", "LargeCactus2.png")),
-            2: pygame.image.load(os.path.join("Assets/Cactus", "LargeCactus3.png"))
-        }
-        Assets.BACKGROUND = pygame.image.load(os.path.join("Assets/Other", "Track.png"))
-        Assets.FONT = pygame.font.Font('freesansbold.ttf', 20)
-
-# Load assets immediately when module is imported
-Assets.load()
+def read_evaluation_settings(config_path):
+    # The [DinoEvaluation] section of config.txt, which NEAT itself ignores
+    parser = configparser.ConfigParser()
+    parser.read(config_path)
+    section = parser['DinoEvaluation'] if parser.has_section('DinoEvaluation') else {}
+    courses = int(section.get('courses', 1))
+    aggregate = section.get('aggregate', 'mean').strip()
+    if courses < 1:
+        raise ValueError(f"courses must be at least 1, got {courses}")
+    if aggregate not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate '{aggregate}', expected one of {sorted(AGGREGATES)}")
+    return courses, aggregate
 
-class Dinosaur:
-    def __init__(self, genome=None, config=None):
-        self.image = Assets.RUNNING[0]
-        self.dino_run = True
-        self.dino_jump = False
-        self.jump_vel = JUMP_VELOCITY
-        self.rect = pygame.Rect(DINO_X_POS, DINO_Y_POS, self.image.get_width(), self.image.get_height())
-        self.color = (0, 255, 0)  # Green for the best dino
-        self.step_index = 0
-        self.genome = genome
-        self.net = neat.nn.FeedForwardNetwork.create(genome, config) if genome and config else None
-        self.fitness = 0
-    
-    def update(self):
-        if self.dino_run:
-            self.run()
-        if self.dino_jump:
-            self.jump()
-        if self.step_index >= 10:
-            self.step_index = 0
-    
-    def jump(self):
-        self.image = Assets.JUMPING
-        
-        if self.dino_jump:
-            self.rect.y -= self.jump_vel * 4
-            self.jump_vel -= 0.8
-        
-        if self.jump_vel <= -JUMP_VELOCITY:
-            self.dino_jump = False
-            self.dino_run = True
-            self.jump_vel = JUMP_VELOCITY
-            
-    def run(self):
-        self.image = Assets.RUNNING[self.step_index // 5]
-        self.rect.x = DINO_X_POS
-        self.rect.y = DINO_Y_POS
-        self.step_index += 1
-    
-    def draw(self, SCREEN):
-        SCREEN.blit(self.image, (self.rect.x, self.rect.y))
-        pygame.draw.rect(SCREEN, self.color, self.rect, 2)
-        
-        for obstacle in GameState.obstacles:
-            pygame.draw.line(SCREEN, self.color, 
-                           (self.rect.x + 54, self.rect.y + 12),
-                           obstacle.rect.center, 2)
-    
-    def to_dict(self):
-        return {
-            'genome_id': self.genome_id,
-            'color': self.color,
-            'fitness': self.fitness,
-            'jump_velocity': self.jump_vel,
-            'position': (self.rect.x, self.rect.y)
-        }
+def start_viewer():
+    from render import open_viewer
+    from viewer import RenderThread, SnapshotBuffer
+    GameState.snapshots = SnapshotBuffer()
+    GameState.viewer = RenderThread(GameState.snapshots, open_viewer)
+    GameState.viewer.start()
 
-class Obstacle:
-    def __init__(self, image, number_of_cacti):
-        self.image = image
-        self.type = number_of_cacti
-        self.rect = self.image[self.type].get_rect()
-        self.rect.x = SCREEN_WIDTH
-
-    def update(self):
-        self.rect.x -= GameState.game_speed
-        return self.rect.x < -self.rect.width  # Returns True if off-SCREEN
-    
-    def draw(self, SCREEN):
-        SCREEN.blit(self.image[self.type], self.rect)
-
-class SmallCactus(Obstacle):
-    def __init__(self, image, number_of_cacti):
-        super().__init__(image, number_of_cacti)
-        self.rect.y = 325
+def save_generation_data(generation, genomes):
+    if GameState.store is None:
+        GameState.store = RunStore(SAVE_DIR)
 
-class LargeCactus(Obstacle):
-    def __init__(self, image, number_of_cacti):
-        super().__init__(image, number_of_cacti)
-        self.rect.y = 300
+    # Only a snapshot is taken here, the store writes it on its own thread
+    if GameState.top_k > 0:
+        records = top_records(genomes, GameState.top_k)
+        fitnesses = [genome.fitness for _, genome in genomes]
+    else:
+        records = [genome_record(genome_id, genome) for genome_id, genome in genomes]
+        fitnesses = None
+    best_dino = GameState.store.save_generation(generation, records, fitnesses)
+    if best_dino:
+        GameState.best_dinos[generation] = best_dino
 
-class GameState:
-    obstacles = []
-    dinosaurs = []
-    gen_pool = []
-    nets = []
-    points = 0
-    game_speed = INITIAL_GAME_SPEED
-    x_pos_bg = 0
-    y_pos_bg = BACKGROUND_Y
-    spawn_cooldown = 2000  # ms
-    last_spawn_time = 0
-    population = None
-    current_generation = 0
-    best_dinos = {}  # To store best dinos from each generation
+def start_generation():
+    GameState.current_generation += 1
+    print(f"\n--- Starting Generation {GameState.current_generation} ---")
+    GameState.truncated = None
+    GameState.action_log = None
+    # All genomes of a generation play the same course, wherever they are evaluated
+    if GameState.course_seed is not None:
+        return GameState.course_seed
+    if GameState.course_rng is not None:
+        return GameState.course_rng.randrange(2**32)
+    return random.randrange(2**32)
 
-    @staticmethod
-    def reset():
-        GameState.obstacles = []
-        GameState.dinosaurs = []
-        GameState.gen_pool = []
-        GameState.nets = []
-        GameState.points = 0
-        GameState.game_speed = INITIAL_GAME_SPEED
-        GameState.x_pos_bg = 0
-        GameState.y_pos_bg = BACKGROUND_Y
+def evaluate_generation(genomes, seed, evaluate):
+    # Fitness of every genome, in order. Genomes identical to one that already
+    # played this episode (same seed and settings) take their fitness from
+    # GameState.fitness_cache; evaluate(gen_pool) plays the others.
+    gen_pool = [genome for _, genome in genomes]
+    cache = GameState.fitness_cache
+    budget = GameState.budget
+    # A wall-time budget makes episodes non-deterministic, so nothing is cached then
+    if cache is None or (budget is not None and budget.max_seconds):
+        return evaluate(gen_pool)
+    hits = cache.hits
+    fitnesses = cache.evaluate(gen_pool, evaluate, seed, GameState.num_courses,
+                               GameState.aggregate, budget, GameState.lookup)
+    if cache.hits > hits:
+        print(f"Fitness cache: {cache.hits - hits} of {len(gen_pool)} genomes reused")
+    return fitnesses
 
-def distance(pos_a, pos_b):
-    dx = pos_a[0] - pos_b[0]
-    dy = pos_a[1] - pos_b[1]
-    return math.sqrt(dx**2 + dy**2)
+def save_actions(generation):
+    # The recorded episode of the generation. Genomes that took their fitness
+    # from the cache did not play, so they are not in it.
+    if GameState.action_log is not None:
+        GameState.store.save_actions(generation, GameState.action_log.to_dict())
 
-def remove_dinosaur(index):
-    GameState.dinosaurs.pop(index)
-    GameState.gen_pool.pop(index)
-    GameState.nets.pop(index)
+def frame_callback():
+    # What to do with each tick of this generation: draw it at the normal frame
+    # rate, hand it to the --watch render thread, or nothing (headless)
+    if GameState.viewer is not None and GameState.viewer.is_alive():
+        return GameState.snapshots.publish
+    if GameState.should_render(GameState.current_generation):
+        from render import GameWindow
+        return GameWindow().tick
+    return None
 
-def score(SCREEN):
-    GameState.points += 1
-    if GameState.points % 100 == 0:
-        GameState.game_speed += 1
-    text = Assets.FONT.render(f"Points: {GameState.points}", True, (0, 0, 0))
-    SCREEN.blit(text, (950, 50))
+def eval_genomes(genomes, config):
+    seed = start_generation()
+    fitnesses = evaluate_generation(genomes, seed, lambda gen_pool: play_generation(
+        gen_pool, config, seed, frame_callback(), GameState.budget, GameState.num_courses,
+        GameState.aggregate, GameState.skip_idle, GameState.lookup, GameState.validate_lookup))
+    for (_, genome), fitness in zip(genomes, fitnesses):
+        genome.fitness = fitness
+    if GameState.lookup_checks:
+        print(f"Decision tables disagreed with the networks on {GameState.lookup_disagreements} "
+              f"of {GameState.lookup_checks} decisions "
+              f"({100 * GameState.lookup_disagreements / GameState.lookup_checks:.3f}%)")
+    if GameState.truncated:
+        print(f"Generation stopped by {GameState.truncated} after {GameState.ticks} ticks "
+              f"with {len(GameState.dinosaurs)} dinosaurs alive")
 
-def statistics(SCREEN):
-    text_1 = Assets.FONT.render(f'Dinosaurs Alive: {len(GameState.dinosaurs)}', True, (0, 0, 0))
-    text_2 = Assets.FONT.render(f'Generation: {GameState.current_generation}', True, (0, 0, 0))
-    text_3 = Assets.FONT.render(f'Game Speed: {GameState.game_speed}', True, (0, 0, 0))
+    # Save generation data after simulation ends
+    profiler = GameState.profiler
+    if profiler: t = profiler.clock()
+    save_generation_data(GameState.current_generation, genomes)
+    save_actions(GameState.current_generation)
+    if profiler: profiler.lap('save', t)
 
-    SCREEN.blit(text_1, (50, 450))
-    SCREEN.blit(text_2, (50, 480))
-    SCREEN.blit(text_3, (50, 510))
+def eval_genomes_parallel(genomes, config):
+    # Same as eval_genomes, but the genomes are split across the worker processes
+    # of GameState.evaluator; nothing is drawn in this mode, and the workers'
+    # phases are only profiled as a whole ('evaluate')
+    seed = start_generation()
+    profiler = GameState.profiler
+    if profiler: t = profiler.clock()
+    args = (config, seed, GameState.budget, GameState.num_courses, GameState.aggregate,
+            GameState.skip_idle, GameState.lookup)
 
-def draw_background(SCREEN):
-    image_width = Assets.BACKGROUND.get_width()
-    SCREEN.blit(Assets.BACKGROUND, (GameState.x_pos_bg, GameState.y_pos_bg))
-    SCREEN.blit(Assets.BACKGROUND, (image_width + GameState.x_pos_bg, GameState.y_pos_bg))
-    
-    if GameState.x_pos_bg <= -image_width:
-        GameState.x_pos_bg = 0
-    GameState.x_pos_bg -= GameState.game_speed
+    def evaluate(gen_pool):
+        if not GameState.record_actions:
+            return GameState.evaluator.evaluate(gen_pool, *args)
+        # Every worker records its own chunk
+        results = GameState.evaluator.map_chunks(gen_pool, *args, True)
+        GameState.action_log = ActionLog.merge([log for _, log in results])
+        return [fitness for fitnesses, _ in results for fitness in fitnesses]
 
-def spawn_obstacle():
-    current_time = pygame.time.get_ticks()
-    if len(GameState.obstacles) < 3 and current_time - GameState.last_spawn_time+random.randint(0,1500)  > GameState.spawn_cooldown:
-        if random.randint(0, 1) == 0:
-            for _ in range(random.randint(1, 3)):
-                GameState.obstacles.append(SmallCactus(Assets.SMALL_CACTUS, random.randint(0, 2)))
-        else:
-            for _ in range(random.randint(1, 3)):
-                GameState.obstacles.append(LargeCactus(Assets.LARGE_CACTUS, random.randint(0, 2)))
-        GameState.last_spawn_time = current_time
+    fitnesses = evaluate_generation(genomes, seed, evaluate)
+    for (_, genome), fitness in zip(genomes, fitnesses):
+        genome.fitness = fitness
+    if profiler: t = profiler.lap('evaluate', t)
 
-def save_generation_data(generation, genomes):
-    # Create save directory if it doesn't exist
-    if not os.path.exists(SAVE_DIR):
-        os.makedirs(SAVE_DIR)
-    
-    # Create generation directory
-    gen_dir = os.path.join(SAVE_DIR, f"gen_{generation}")
-    if not os.path.exists(gen_dir):
-        os.makedirs(gen_dir)
-    
-    # Save each dinosaur's data
-    best_fitness = -1
-    best_dino = None
-    
-    for genome_id, genome in genomes:
-        dino_data = {
-            'genome_id': genome_id,
-            'fitness': genome.fitness,
-            'connections': [
-                {
-                    'in': c.key[0],
-                    'out': c.key[1],
-                    'weight': c.weight,
-                    'enabled': c.enabled
-                } 
-                for c in genome.connections.values()
-            ],
-            'nodes': [
-                {
-                    'id': node_id,
-                    'bias': node.bias,
-                    'activation': node.activation,
-                    'aggregation': node.aggregation,
-                    'response': node.response
-                }
-                for node_id, node in genome.nodes.items()
-            ]
-        }
-        
-        # Save to file
-        with open(os.path.join(gen_dir, f"dino_{genome_id}.json"), 'w') as f:
-            json.dump(dino_data, f, indent=2)
-        
-        # Track best dino
-        if genome.fitness > best_fitness:
-            best_fitness = genome.fitness
-            best_dino = dino_data
-    
-    # Save best dino of this generation
-    if best_dino:
-        GameState.best_dinos[generation] = best_dino
-        with open(os.path.join(gen_dir, "best_dino.json"), 'w') as f:
-            json.dump(best_dino, f, indent=2)
-    
-    # Save summary of all generations
-    with open(os.path.join(SAVE_DIR, "generations_summary.json"), 'w') as f:
-        json.dump(GameState.best_dinos, f, indent=2)
-def eval_genomes(genomes, config):
-    GameState.reset()
-    clock = pygame.time.Clock()
-    
-    GameState.current_generation += 1
-    print(f"\n--- Starting Generation {GameState.current_generation} ---")
-    
-    # Initialize NEAT population
-    for genome_id, genome in genomes:
-        dino = Dinosaur()
-        dino.genome_id = genome_id
-        GameState.dinosaurs.append(dino)
-        GameState.gen_pool.append(genome)
-        GameState.nets.append(neat.nn.FeedForwardNetwork.create(genome, config))
-        genome.fitness = 0
-
-    while True:
-        if not GameState.dinosaurs:
-            break
-
-        SCREEN.fill((255, 255, 255))
-        
-        # Game logic
-        for dinosaur in GameState.dinosaurs:
-            dinosaur.update()
-            dinosaur.draw(SCREEN)
-        
-        if not GameState.dinosaurs:
-            break
-        
-        # Obstacle management
-        spawn_obstacle()
-        GameState.obstacles = [obstacle for obstacle in GameState.obstacles if not obstacle.update()]
-        
-        for obstacle in GameState.obstacles:
-            obstacle.draw(SCREEN)
-            for i, dinosaur in enumerate(GameState.dinosaurs):
-                if dinosaur.rect.colliderect(obstacle.rect):
-                    GameState.gen_pool[i].fitness -= 1
-                    remove_dinosaur(i)
-        
-        # AI decision making
-        for i, dinosaur in enumerate(GameState.dinosaurs):
-            if GameState.obstacles:
-                output = GameState.nets[i].activate((
-                    dinosaur.rect.y,
-                    distance((dinosaur.rect.x, dinosaur.rect.y),
-                             GameState.obstacles[0].rect.midtop)
-                ))
-                if output[0] > 0.5 and dinosaur.rect.y == DINO_Y_POS:
-                    dinosaur.dino_jump = True
-                    dinosaur.dino_run = False
-        
-        # Update fitness for surviving dinosaurs
-        for i, dinosaur in enumerate(GameState.dinosaurs):
-            GameState.gen_pool[i].fitness += 0.1
-        
-        # Drawing
-        statistics(SCREEN)
-        score(SCREEN)
-        draw_background(SCREEN)
-        
-        pygame.display.update()
-        clock.tick(FPS)
-    
-    # Save generation data after simulation ends
     save_generation_data(GameState.current_generation, genomes)
+    save_actions(GameState.current_generation)
+    if profiler: profiler.lap('save', t)
 
-def run(config_path):
+def run(config_path, workers=0, resume=None, checkpoint_every=CHECKPOINT_EVERY, profile=None,
+        coordinator=None, worker_timeout=None, save_dir=SAVE_DIR, generations=NUMBER_OF_GENERATIONS):
     config = neat.config.Config(
         neat.DefaultGenome,
         neat.DefaultReproduction,
@@ -334,31 +168,166 @@ def run(config_path):
         config_path
     )
     
+    courses, aggregate = read_evaluation_settings(config_path)
+    if GameState.num_courses is None:
+        GameState.num_courses = courses
+    if GameState.aggregate is None:
+        GameState.aggregate = aggregate
+    if GameState.num_courses > 1:
+        print(f"Every genome plays {GameState.num_courses} courses per generation "
+              f"({GameState.aggregate} fitness)")
+
+    if GameState.fitness_cache is None and GameState.fitness_cache_size > 0:
+        GameState.fitness_cache = FitnessCache(GameState.fitness_cache_size)
+
+    if GameState.top_k is None:
+        GameState.top_k = LARGE_POPULATION_TOP_K if config.pop_size >= LARGE_POPULATION else 0
+    if GameState.top_k > 0:
+        print(f"Saving the top {GameState.top_k} genomes of each generation")
+
+    if resume:
+        # Continue from the checkpoint, dropping anything saved after it
+        GameState.population, state = restore_checkpoint(resume, config)
+        GameState.restore_checkpoint_state(state)
+        rollback(save_dir, GameState.current_generation)
+        GameState.store = RunStore(save_dir, append=True)
+        print(f"Resuming from '{resume}' after generation {GameState.current_generation}")
+    else:
+        GameState.population = neat.Population(config)
+        GameState.store = RunStore(save_dir)
+
     # Add reporter to show progress in console
     stats = neat.StatisticsReporter()
-    GameState.population = neat.Population(config)
+    checkpointer = Checkpointer(GameState.population,
+                                os.path.join(save_dir, os.path.basename(CHECKPOINT_PATH)),
+                                checkpoint_every, GameState.checkpoint_state)
     GameState.population.add_reporter(stats)
     GameState.population.add_reporter(neat.StdOutReporter(True))
+    GameState.population.add_reporter(checkpointer)
+    if profile:
+        GameState.profiler = Profiler()
+        GameState.population.add_reporter(ProfileReporter(GameState.profiler, profile,
+                                                          append=bool(resume)))
     
-    # Run for up to NUMBER_OF_GENERATIONS generations
-    GameState.population.run(eval_genomes, NUMBER_OF_GENERATIONS)
+    # Run up to generation `generations` (NUMBER_OF_GENERATIONS by default)
+    generations = generations - GameState.current_generation
+    if coordinator:
+        # Chunks are played by cluster.py workers connecting from any host
+        GameState.evaluator = RemoteEvaluator(parse_address(coordinator), config_path,
+                                              worker_timeout)
+        print(f"Coordinator listening on {coordinator}; start workers with "
+              f"'python cluster.py HOST:PORT'")
+        GameState.population.run(eval_genomes_parallel, generations)
+        GameState.evaluator.close()
+    elif workers > 0:
+        GameState.evaluator = ParallelEvaluator(workers, evaluate_chunk)
+        GameState.population.run(eval_genomes_parallel, generations)
+        GameState.evaluator.close()
+    else:
+        GameState.population.run(eval_genomes, generations)
+    checkpointer.wait()
+    GameState.store.close()
+    if GameState.viewer is not None:
+        GameState.viewer.stop()
     
     # After all generations, print summary
     print("\n--- Training Complete ---")
-    print(f"Saved data for {GameState.current_generation} generations in '{SAVE_DIR}' directory")
+    print(f"Saved data for {GameState.current_generation} generations in '{save_dir}' directory")
     
     # Find the overall best dinosaur
     if GameState.best_dinos:
         best_gen = max(GameState.best_dinos.items(), key=lambda x: x[1]['fitness'])
         print(f"\nBest dinosaur was from generation {best_gen[0]} with fitness {best_gen[1]['fitness']}")
-        print(f"You can find its data in: {os.path.join(SAVE_DIR, f'gen_{best_gen[0]}', 'best_dino.json')}")
+        print(f"You can find its data in: {os.path.join(save_dir, 'genomes.jsonl')} (see index.jsonl)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the dinosaur AI with NEAT")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS,
+                        help="run the simulation without a window and without a frame cap")
+    parser.add_argument("--render-every", type=int, default=RENDER_EVERY,
+                        help="in headless mode, draw every Nth generation (0 = never)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="evaluate genomes in this many worker processes (0 = in this process)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for NEAT and the obstacle courses, to make a run reproducible")
+    parser.add_argument("--coordinator", default=None, metavar="[HOST:]PORT",
+                        help="evaluate genomes on cluster.py workers that connect to this address")
+    parser.add_argument("--worker-timeout", type=float, default=None,
+                        help="with --coordinator, re-dispatch a chunk whose worker has not "
+                             "answered after this many seconds")
+    parser.add_argument("--watch", action="store_true",
+                        help="train headless and show the live run from a separate render thread")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help="save a checkpoint every N generations (0 = never)")
+    parser.add_argument("--resume", nargs="?", const=CHECKPOINT_PATH, default=None,
+                        help=f"continue a run from a checkpoint (default: {CHECKPOINT_PATH})")
+    parser.add_argument("--max-ticks", type=int, default=0,
+                        help="end every generation after this many ticks (0 = no limit)")
+    parser.add_argument("--max-seconds", type=float, default=0,
+                        help="end every generation after this much wall time (0 = no limit)")
+    parser.add_argument("--max-score", type=int, default=0,
+                        help="end every generation once the score reaches this (0 = no limit)")
+    parser.add_argument("--courses", type=int, default=None,
+                        help="courses every genome plays per generation (default: from config.txt)")
+    parser.add_argument("--aggregate", choices=sorted(AGGREGATES), default=None,
+                        help="how fitness over the courses is combined (default: from config.txt)")
+    parser.add_argument("--course-seed", type=int, default=None,
+                        help="play the same course(s) every generation instead of new ones; "
+                             "unchanged genomes then reuse their cached fitness")
+    parser.add_argument("--course-sequence", type=int, default=None, metavar="SEED",
+                        help="draw the courses of the generations from their own generator seeded "
+                             "with SEED, so runs with different configs play the same courses")
+    parser.add_argument("--fitness-cache", type=int, default=FITNESS_CACHE_SIZE,
+                        help="reuse the fitness of up to N identical genomes on identical courses (0 = off)")
+    parser.add_argument("--skip-idle", action="store_true",
+                        help="fast-forward ticks in which nothing but motion can happen (same results)")
+    parser.add_argument("--lookup", type=float, nargs="?", const=1.0, default=None,
+                        help="decide with per-genome lookup tables over the distance input, "
+                             "at this resolution in pixels (default 1.0) instead of the networks")
+    parser.add_argument("--validate-lookup", action="store_true",
+                        help="with --lookup, also evaluate the networks and report disagreements "
+                             "(in-process only)")
+    parser.add_argument("--top-k", type=int, default=None,
+                        help=f"only save the K fittest genomes of each generation (0 = all; "
+                             f"default: {LARGE_POPULATION_TOP_K} from pop_size {LARGE_POPULATION} on, else all)")
+    parser.add_argument("--record-actions", action="store_true",
+                        help="save the jumps of every generation's episode, to replay it with replay.py")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_PATH, default=None,
+                        help=f"time the phases of every generation and save them as CSV (default: {PROFILE_PATH})")
+    return parser.parse_args()
 
 if __name__ == '__main__':
+    args = parse_args()
+    GameState.headless = args.headless
+    GameState.render_every = args.render_every
+    GameState.top_k = args.top_k
+    GameState.fitness_cache_size = args.fitness_cache
+    GameState.course_seed = args.course_seed
+    if args.course_sequence is not None:
+        GameState.course_rng = random.Random(args.course_sequence)
+    GameState.skip_idle = args.skip_idle
+    GameState.lookup = args.lookup
+    GameState.validate_lookup = args.validate_lookup
+    GameState.record_actions = args.record_actions
+    GameState.num_courses = args.courses
+    GameState.aggregate = args.aggregate
+    if args.max_ticks or args.max_seconds or args.max_score:
+        GameState.budget = Budget(args.max_ticks, args.max_seconds, args.max_score)
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.watch:
+        if args.workers > 0 or args.coordinator:
+            raise SystemExit("--watch needs the simulation to run in this process (no --workers)")
+        GameState.headless = True
+        GameState.render_every = 0
+        start_viewer()
+
     local_dir = os.path.dirname(__file__)
     config_path = os.path.join(local_dir, 'config.txt')
     
     # Clear previous saves if needed (optional)
-    if os.path.exists(SAVE_DIR):
+    if os.path.exists(SAVE_DIR) and not args.resume:
         print(f"Warning: '{SAVE_DIR}' directory already exists. Previous data will be overwritten.")
     
-    run(config_path)
\ No newline at end of file
+    run(config_path, args.workers, args.resume, args.checkpoint_every, args.profile,
+        args.coordinator, args.worker_timeout)
\ No newline at end of file
@@ -0,0 +1,47 @@
+import multiprocessing
+
+
+def split(items, count):
+    # Splits items into count contiguous chunks whose sizes differ by at most one
+    size, extra = divmod(len(items), count)
+    chunks = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+class ParallelEvaluator:
+    # In the spirit of neat.ParallelEvaluator, but instead of one job per genome
+    # each worker gets a chunk of genomes and plays them together in one headless
+    # episode. eval_chunk(genomes, config, *args) must be a module-level function
+    # returning one fitness value per genome (for evaluate; map_chunks returns
+    # whatever it returns, per chunk).
+    def __init__(self, num_workers, eval_chunk, timeout=None):
+        self.num_workers = num_workers
+        self.eval_chunk = eval_chunk
+        self.timeout = timeout
+        self.pool = multiprocessing.Pool(num_workers)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def map_chunks(self, genomes, config, *args):
+        jobs = [self.pool.apply_async(self.eval_chunk, (chunk, config) + args)
+                for chunk in split(genomes, self.num_workers)]
+        return [job.get(timeout=self.timeout) for job in jobs]
+
+    def evaluate(self, genomes, config, *args):
+        fitnesses = []
+        for chunk_fitnesses in self.map_chunks(genomes, config, *args):
+            fitnesses.extend(chunk_fitnesses)
+        return fitnesses
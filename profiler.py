@@ -0,0 +1,78 @@
+import csv
+import os
+import time
+
+from neat.reporting import BaseReporter
+
+
+class Profiler:
+    # Accumulates wall time and call counts per phase. The hot path keeps a
+    # reference that is None when profiling is off, so a disabled profiler only
+    # costs one `if` per phase:
+    #     if profiler: t = profiler.lap('update', t)
+    def __init__(self):
+        self.clock = time.perf_counter
+        self.seconds = {}
+        self.calls = {}
+
+    def reset(self):
+        self.seconds = {}
+        self.calls = {}
+
+    def lap(self, phase, start):
+        # Charges the time since start to phase and returns the current time,
+        # which is the start of the next phase
+        now = self.clock()
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + now - start
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        return now
+
+
+class ProfileReporter(BaseReporter):
+    # Reports the phases of every generation next to StdOutReporter, and appends
+    # them to a CSV file (one row per generation and phase) when csv_path is set.
+    # NEAT's own speciation and reproduction are charged to the 'neat' phase and
+    # the whole generation to 'total'.
+    FIELDS = ('generation', 'phase', 'seconds', 'calls', 'share')
+
+    def __init__(self, profiler, csv_path=None, append=False, show=True):
+        self.profiler = profiler
+        self.csv_path = csv_path
+        self.show = show
+        self.generation = None
+        self.start = self.evaluated = None
+        if csv_path and not (append and os.path.exists(csv_path)):
+            directory = os.path.dirname(csv_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(csv_path, 'w', newline='') as f:
+                csv.writer(f).writerow(self.FIELDS)
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.profiler.reset()
+        self.start = self.profiler.clock()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.evaluated = self.profiler.clock()
+
+    def end_generation(self, config, population, species_set):
+        if self.evaluated is not None:
+            self.profiler.lap('neat', self.evaluated)
+        total = self.profiler.clock() - self.start
+        rows = [(phase, seconds, self.profiler.calls[phase])
+                for phase, seconds in sorted(self.profiler.seconds.items(),
+                                             key=lambda item: -item[1])]
+        rows.append(('total', total, 1))
+
+        if self.show:
+            print("Profile: " + ", ".join(
+                f"{phase} {seconds:.3f}s ({100 * seconds / total:.0f}%, {calls} calls)"
+                for phase, seconds, calls in rows[:-1]))
+        if self.csv_path:
+            with open(self.csv_path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                for phase, seconds, calls in rows:
+                    writer.writerow((self.generation, phase, f"{seconds:.6f}", calls,
+                                     f"{seconds / total:.4f}"))
+        self.evaluated = None
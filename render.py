@@ -0,0 +1,237 @@
+import os
+
+import numpy as np
+import pygame
+
+from constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, FPS, BACKGROUND_Y, DINO_X_POS, DINO_WIDTH, DINO_HEIGHT,
+)
+from course import SMALL
+
+# Above this many dirty rectangles a single full-screen update is cheaper
+MAX_DIRTY_RECTS = 200
+# Only the best few dinosaurs get sensor lines to the obstacles
+SENSOR_LINES_TOP_K = 3
+# Above this many live dinosaurs the groups are drawn as a density strip
+DENSITY_STRIP_THRESHOLD = 1000
+
+
+def convert_images(images):
+    # Display-format copies of a surface or a dict of surfaces; blitting them
+    # skips the per-pixel format conversion. Needs pygame.display.set_mode first.
+    if isinstance(images, dict):
+        return {key: image.convert_alpha() for key, image in images.items()}
+    return images.convert_alpha()
+
+
+class TextCache:
+    # Keeps one rendered surface per slot and only renders again when the text changes
+    def __init__(self, font, color=(0, 0, 0)):
+        self.font = font
+        self.color = color
+        self.texts = {}
+        self.surfaces = {}
+
+    def surface(self, slot, text):
+        if self.texts.get(slot) != text:
+            self.texts[slot] = text
+            self.surfaces[slot] = self.font.render(text, True, self.color)
+        return self.surfaces[slot]
+
+
+class FrameRenderer:
+    # Draws a frame through the same calls as a Surface (blit) plus rect/line
+    # helpers, remembering what was touched. end_frame() then only pushes the
+    # areas drawn in this frame or in the previous one to the display, and
+    # begin_frame() only clears what the previous frame drew.
+    def __init__(self, screen, background=(255, 255, 255)):
+        self.screen = screen
+        self.background = background
+        self.previous = []
+        self.current = []
+        self.full_redraw = True
+
+    def begin_frame(self):
+        if self.full_redraw:
+            self.screen.fill(self.background)
+        else:
+            for rect in self.previous:
+                self.screen.fill(self.background, rect)
+
+    def blit(self, image, position):
+        self.current.append(self.screen.blit(image, position))
+
+    def blits(self, sequence):
+        self.current.extend(self.screen.blits(sequence))
+
+    def rect(self, color, rect, width=0):
+        self.current.append(pygame.draw.rect(self.screen, color, rect, width))
+
+    def line(self, color, start, end, width=1):
+        self.current.append(pygame.draw.line(self.screen, color, start, end, width))
+
+    def end_frame(self):
+        dirty = self.previous + self.current
+        if self.full_redraw or len(dirty) > MAX_DIRTY_RECTS:
+            pygame.display.update()
+        else:
+            pygame.display.update(dirty)
+        self.full_redraw = len(self.current) > MAX_DIRTY_RECTS
+        self.previous = self.current
+        self.current = []
+
+
+class PopulationRenderer:
+    # Level-of-detail drawing of a DinoPopulation. Dinosaurs in the same state
+    # (y, sprite) overlap pixel for pixel, so each state is blitted once with a
+    # count badge; sensor lines are drawn for the top-K dinosaurs by fitness only,
+    # and very large populations are summarised by a density strip. The cost
+    # depends on the number of distinct states, not on the population size.
+    def __init__(self, sprites, texts, color=(0, 255, 0), top_k=SENSOR_LINES_TOP_K,
+                 density_threshold=DENSITY_STRIP_THRESHOLD):
+        self.sprites = sprites  # Images indexed by DinoPopulation.sprite
+        self.texts = texts
+        self.color = color
+        self.top_k = top_k
+        self.density_threshold = density_threshold
+
+    def draw(self, renderer, y, sprite, fitness, targets):
+        # y, sprite and fitness are arrays over the live dinosaurs
+        if not len(y):
+            return
+        keys, counts = np.unique(y * len(self.sprites) + sprite, return_counts=True)
+        group_y, group_sprite = np.divmod(keys, len(self.sprites))
+
+        best = np.argsort(-fitness, kind='stable')[:self.top_k]
+        if len(y) > self.density_threshold:
+            self.draw_density_strip(renderer, group_y, counts)
+            self.draw_groups(renderer, y[best], sprite[best], None)
+        else:
+            self.draw_groups(renderer, group_y, group_sprite, counts)
+
+        for y in np.unique(y[best]).tolist():
+            for target in targets:
+                renderer.line(self.color, (DINO_X_POS + 54, y + 12), target, 2)
+
+    def draw_groups(self, renderer, group_y, group_sprite, counts):
+        renderer.blits([(self.sprites[s], (DINO_X_POS, y))
+                        for y, s in zip(group_y.tolist(), group_sprite.tolist())])
+        for i, y in enumerate(group_y.tolist()):
+            renderer.rect(self.color, (DINO_X_POS, y, DINO_WIDTH, DINO_HEIGHT), 2)
+            if counts is not None and counts[i] > 1:
+                slot = ('group', y, int(group_sprite[i]))
+                badge = self.texts.surface(slot, f"x{counts[i]}")
+                renderer.blit(badge, (DINO_X_POS + DINO_WIDTH + 4, y))
+
+    def draw_density_strip(self, renderer, group_y, counts):
+        # One bar per height, as long as the share of dinosaurs at that height
+        heights = {}
+        for y, count in zip(group_y.tolist(), counts.tolist()):
+            heights[y] = heights.get(y, 0) + count
+        total = sum(heights.values())
+        for y, count in heights.items():
+            length = max(1, int(60 * count / total))
+            renderer.rect(self.color, (DINO_X_POS - 70, y, length, 4))
+
+
+# The window and the assets are only created once something actually needs to
+# be drawn; importing this module has no side effects
+SCREEN = None
+
+def get_screen():
+    global SCREEN
+    if SCREEN is None:
+        pygame.init()
+        SCREEN = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        Assets.load()
+    return SCREEN
+
+
+class Assets:
+    loaded = False
+
+    @staticmethod
+    def load():
+        # Needs the display, the images are converted to its format right away
+        if Assets.loaded:
+            return
+        Assets.RUNNING = {
+            0: pygame.image.load(os.path.join("Assets/Dino", "DinoRun1.png")),
+            1: pygame.image.load(os.path.join("Assets/Dino", "DinoRun2.png"))
+        }
+        Assets.JUMPING = pygame.image.load(os.path.join("Assets/Dino", "DinoJump.png"))
+        Assets.SMALL_CACTUS = {
+            0: pygame.image.load(os.path.join("Assets/Cactus", "SmallCactus1.png")),
+            1: pygame.image.load(os.path.join("Assets/Cactus", "SmallCactus2.png")),
+            2: pygame.image.load(os.path.join("Assets/Cactus", "SmallCactus3.png"))
+        }
+        Assets.LARGE_CACTUS = {
+            0: pygame.image.load(os.path.join("Assets/Cactus", "LargeCactus1.png")),
+            1: pygame.image.load(os.path.join("Assets/Cactus", "LargeCactus2.png")),
+            2: pygame.image.load(os.path.join("Assets/Cactus", "LargeCactus3.png"))
+        }
+        Assets.BACKGROUND = pygame.image.load(os.path.join("Assets/Other", "Track.png"))
+        Assets.FONT = pygame.font.Font('freesansbold.ttf', 20)
+        Assets.TEXT = TextCache(Assets.FONT)
+
+        for name in ('RUNNING', 'JUMPING', 'SMALL_CACTUS', 'LARGE_CACTUS', 'BACKGROUND'):
+            setattr(Assets, name, convert_images(getattr(Assets, name)))
+        Assets.loaded = True
+
+
+def score(SCREEN, snapshot):
+    text = Assets.TEXT.surface('points', f"Points: {snapshot.points}")
+    SCREEN.blit(text, (950, 50))
+
+def statistics(SCREEN, snapshot):
+    text_1 = Assets.TEXT.surface('alive', f'Dinosaurs Alive: {snapshot.alive}')
+    text_2 = Assets.TEXT.surface('generation', f'Generation: {snapshot.generation}')
+    text_3 = Assets.TEXT.surface('speed', f'Game Speed: {snapshot.game_speed}')
+
+    SCREEN.blit(text_1, (50, 450))
+    SCREEN.blit(text_2, (50, 480))
+    SCREEN.blit(text_3, (50, 510))
+
+def draw_background(SCREEN, snapshot):
+    image_width = Assets.BACKGROUND.get_width()
+    SCREEN.blit(Assets.BACKGROUND, (snapshot.x_pos_bg, BACKGROUND_Y))
+    SCREEN.blit(Assets.BACKGROUND, (image_width + snapshot.x_pos_bg, BACKGROUND_Y))
+
+def make_population_renderer():
+    # Sprites indexed by DinoPopulation.sprite (the last one is JUMPING_SPRITE)
+    return PopulationRenderer((Assets.RUNNING[0], Assets.RUNNING[1], Assets.JUMPING), Assets.TEXT)
+
+def draw_frame(SCREEN, population_renderer, snapshot):
+    SCREEN.begin_frame()
+    targets = []
+    for kind, cactus_type, x, y in snapshot.obstacles:
+        image = (Assets.SMALL_CACTUS if kind == SMALL else Assets.LARGE_CACTUS)[cactus_type]
+        SCREEN.blit(image, (x, y))
+        targets.append((x + image.get_width() // 2, y + image.get_height() // 2))
+    population_renderer.draw(SCREEN, snapshot.y, snapshot.sprite, snapshot.fitness, targets)
+    statistics(SCREEN, snapshot)
+    score(SCREEN, snapshot)
+    draw_background(SCREEN, snapshot)
+    SCREEN.end_frame()
+
+
+class GameWindow:
+    # Draws game snapshots into the window; tick() also caps the frame rate (at
+    # fps, 0 = uncapped), for drawing straight from the simulation loop
+    def __init__(self, fps=FPS):
+        self.screen = FrameRenderer(get_screen())
+        self.population_renderer = make_population_renderer()
+        self.clock = pygame.time.Clock()
+        self.fps = fps
+
+    def draw(self, snapshot):
+        draw_frame(self.screen, self.population_renderer, snapshot)
+
+    def tick(self, snapshot):
+        self.draw(snapshot)
+        self.clock.tick(self.fps)
+
+
+def open_viewer():
+    # Runs on the render thread, which owns the window
+    return GameWindow().draw
@@ -0,0 +1,73 @@
+import argparse
+
+import runstore
+from actionlog import ActionLog
+from constants import FPS, SAVE_DIR
+from game import GameState, replay_generation
+
+# Replays a generation recorded with main.py --record-actions, from its course
+# seed and the jumps of its dinosaurs: drawn at any speed from any tick, or
+# headless to check that it reproduces the recorded fitness values.
+
+
+def check_fitness(directory, generation, log, fitnesses):
+    # Compares the replayed fitness of every stored genome with its record
+    entry = next((entry for entry in runstore.read_index(directory)
+                  if entry['generation'] == generation), None)
+    if entry is None:
+        print("The generation has no stored genomes to compare with")
+        return
+    recorded = {record['genome_id']: record['fitness']
+                for record in runstore.read_generation(directory, entry)}
+    compared = [(recorded[genome_id], fitness)
+                for genome_id, fitness in zip(log.genome_ids, fitnesses) if genome_id in recorded]
+    matching = sum(1 for old, new in compared if old == new)
+    print(f"{matching} of {len(compared)} stored genomes replayed with their recorded fitness")
+
+
+def draw_callback(speed):
+    # Draws every tick at speed times the game's frame rate (0 = as fast as possible)
+    import pygame
+    from render import GameWindow
+    window = GameWindow(FPS * speed)
+
+    def on_tick(snapshot):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                raise SystemExit
+        window.tick(snapshot)
+    return on_tick
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay a recorded generation")
+    parser.add_argument("generation", type=int, nargs="?", default=None,
+                        help="generation to replay (default: the last recorded one)")
+    parser.add_argument("--start", type=int, default=0,
+                        help="tick to start drawing from; earlier ticks are fast-forwarded")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="playback speed relative to the game (0 = as fast as possible)")
+    parser.add_argument("--headless", action="store_true",
+                        help="replay without drawing and compare the fitness with the saved genomes")
+    parser.add_argument("--save-dir", default=SAVE_DIR,
+                        help="run directory written by main.py")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    actions = runstore.read_actions(args.save_dir, args.generation)
+    if actions is None:
+        raise SystemExit("No recorded generation found. Train with --record-actions first.")
+    log = ActionLog.from_dict(actions)
+    generation = actions['generation']
+    GameState.current_generation = generation
+    print(f"Replaying generation {generation}: {log.size} genomes on {log.courses} course(s), "
+          f"{log.ticks} ticks")
+
+    on_tick = None if args.headless else draw_callback(args.speed)
+    fitnesses = replay_generation(log, on_tick, args.start)
+    print(f"Best replayed fitness: {max(fitnesses, default=0):.1f}")
+    if args.headless:
+        check_fitness(args.save_dir, generation, log, fitnesses)
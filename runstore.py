@@ -0,0 +1,249 @@
+import atexit
+import heapq
+import json
+import os
+import queue
+import threading
+
+import neat
+
+# A run is stored as append-only JSON Lines files:
+#   genomes.jsonl - one compact record per genome per generation
+#   index.jsonl   - one line per generation with summary statistics and the byte
+#                   offset/length of the generation's best genome in genomes.jsonl
+#   actions.jsonl - with --record-actions, one actionlog.ActionLog.to_dict() per
+#                   generation, enough to replay its episode (replay.py)
+# A generation may store only its top genomes (top_records); its statistics still
+# cover the whole population.
+GENOMES_FILE = "genomes.jsonl"
+INDEX_FILE = "index.jsonl"
+ACTIONS_FILE = "actions.jsonl"
+
+
+def genome_record(genome_id, genome):
+    return {
+        'genome_id': genome_id,
+        'fitness': genome.fitness,
+        'connections': [
+            {
+                'in': c.key[0],
+                'out': c.key[1],
+                'weight': c.weight,
+                'enabled': c.enabled
+            }
+            for c in genome.connections.values()
+        ],
+        'nodes': [
+            {
+                'id': node_id,
+                'bias': node.bias,
+                'activation': node.activation,
+                'aggregation': node.aggregation,
+                'response': node.response
+            }
+            for node_id, node in genome.nodes.items()
+        ]
+    }
+
+
+def genome_from_record(record):
+    # Rebuilds a neat.DefaultGenome from a genome_record() dict
+    genome = neat.DefaultGenome(record['genome_id'])
+    genome.fitness = record['fitness']
+
+    for node_data in record['nodes']:
+        node_id = node_data['id']
+        genome.nodes[node_id] = neat.genome.DefaultNodeGene(node_id)
+        genome.nodes[node_id].bias = node_data['bias']
+        genome.nodes[node_id].activation = node_data['activation']
+        genome.nodes[node_id].aggregation = node_data['aggregation']
+        genome.nodes[node_id].response = node_data['response']
+
+    for conn_data in record['connections']:
+        key = (conn_data['in'], conn_data['out'])
+        genome.connections[key] = neat.genome.DefaultConnectionGene(key)
+        genome.connections[key].weight = conn_data['weight']
+        genome.connections[key].enabled = conn_data['enabled']
+
+    return genome
+
+
+def top_records(genomes, k):
+    # Records of the k fittest genomes only, fittest first. With very large
+    # populations this keeps the per-generation cost and file growth bounded.
+    best = heapq.nlargest(k, genomes, key=lambda item: item[1].fitness)
+    return [genome_record(genome_id, genome) for genome_id, genome in best]
+
+
+def encode(data):
+    return (json.dumps(data, separators=(',', ':')) + "\n").encode("utf-8")
+
+
+class RunStore:
+    # Writes generations on a background thread so the training loop never waits
+    # on the disk. save_generation() only takes a snapshot of the genomes, which
+    # NEAT is free to mutate or replace as soon as it returns.
+    def __init__(self, directory, append=False):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        mode = 'ab' if append else 'wb'
+        self.genomes_file = open(os.path.join(directory, GENOMES_FILE), mode)
+        self.index_file = open(os.path.join(directory, INDEX_FILE), mode)
+        self.actions_file = None  # Only created once a generation has actions
+        self.append = append
+        if not append and os.path.exists(os.path.join(directory, ACTIONS_FILE)):
+            os.remove(os.path.join(directory, ACTIONS_FILE))  # From an earlier run
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._writer, name="RunStore", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def save_generation(self, generation, records, fitnesses=None):
+        # records is a list of genome_record() dicts; returns the best one.
+        # fitnesses holds the fitness of the whole population when records only
+        # covers part of it.
+        best = max(records, key=lambda record: record['fitness'], default=None)
+        if fitnesses is None:
+            fitnesses = [record['fitness'] for record in records]
+        self.queue.put((self._write, (generation, records, best, fitnesses)))
+        return best
+
+    def save_actions(self, generation, actions):
+        # actions is an ActionLog.to_dict() of the generation's episode
+        self.queue.put((self._write_actions, (generation, actions)))
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+            self.genomes_file.close()
+            self.index_file.close()
+            if self.actions_file is not None:
+                self.actions_file.close()
+
+    def _writer(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            write, args = item
+            write(*args)
+            self.queue.task_done()
+
+    def _write(self, generation, records, best, fitnesses):
+        start = self.genomes_file.tell()
+        best_offset = best_length = 0
+        for record in records:
+            line = encode(record)
+            if record is best:
+                best_offset, best_length = self.genomes_file.tell(), len(line)
+            self.genomes_file.write(line)
+        self.genomes_file.flush()
+
+        self.index_file.write(encode({
+            'generation': generation,
+            'size': len(fitnesses),
+            'stored': len(records),
+            'best_genome_id': best['genome_id'] if best else None,
+            'best_fitness': best['fitness'] if best else None,
+            'mean_fitness': sum(fitnesses) / len(fitnesses) if fitnesses else None,
+            'offset': start,
+            'length': self.genomes_file.tell() - start,
+            'best_offset': best_offset,
+            'best_length': best_length,
+        }))
+        self.index_file.flush()
+
+    def _write_actions(self, generation, actions):
+        if self.actions_file is None:
+            self.actions_file = open(os.path.join(self.directory, ACTIONS_FILE),
+                                     'ab' if self.append else 'wb')
+        self.actions_file.write(encode(dict(actions, generation=generation)))
+        self.actions_file.flush()
+
+
+def read_index(directory):
+    path = os.path.join(directory, INDEX_FILE)
+    with open(path, 'rb') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def read_record(directory, offset, length):
+    # A single seek and read into genomes.jsonl
+    with open(os.path.join(directory, GENOMES_FILE), 'rb') as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+
+def read_generation(directory, entry):
+    with open(os.path.join(directory, GENOMES_FILE), 'rb') as f:
+        f.seek(entry['offset'])
+        return [json.loads(line) for line in f.read(entry['length']).splitlines()]
+
+
+def read_actions(directory, generation=None):
+    # The recorded episode of a generation (the last recorded one by default),
+    # as saved by save_actions, or None
+    path = os.path.join(directory, ACTIONS_FILE)
+    if not os.path.exists(path):
+        return None
+    found = None
+    with open(path, 'rb') as f:
+        for line in f:
+            actions = json.loads(line)
+            if generation is None or actions['generation'] == generation:
+                found = actions
+    return found
+
+
+def load_best(directory):
+    # Best genome of the whole run, as (generation, record)
+    index = [entry for entry in read_index(directory) if entry['best_genome_id'] is not None]
+    if not index:
+        raise ValueError("No generations data available.")
+    entry = max(index, key=lambda entry: entry['best_fitness'])
+    return entry['generation'], read_record(directory, entry['best_offset'], entry['best_length'])
+
+
+def load_top(directory, n):
+    # The n best distinct genomes among the per-generation bests of the run, as
+    # (generation, record), best first
+    index = [entry for entry in read_index(directory) if entry['best_genome_id'] is not None]
+    index.sort(key=lambda entry: entry['best_fitness'], reverse=True)
+    top, seen = [], set()
+    for entry in index:
+        if entry['best_genome_id'] in seen:
+            continue
+        seen.add(entry['best_genome_id'])
+        top.append((entry['generation'], read_record(directory, entry['best_offset'], entry['best_length'])))
+        if len(top) == n:
+            break
+    return top
+
+
+def rollback(directory, generation):
+    # Drops every generation after `generation`, e.g. before resuming a run from
+    # a checkpoint that is older than the last saved generation
+    try:
+        index = read_index(directory)
+    except FileNotFoundError:
+        return
+    kept = [entry for entry in index if entry['generation'] <= generation]
+    end = kept[-1]['offset'] + kept[-1]['length'] if kept else 0
+    with open(os.path.join(directory, GENOMES_FILE), 'r+b') as f:
+        f.truncate(end)
+    with open(os.path.join(directory, INDEX_FILE), 'wb') as f:
+        for entry in kept:
+            f.write(encode(entry))
+
+    path = os.path.join(directory, ACTIONS_FILE)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            lines = [line for line in f if json.loads(line)['generation'] <= generation]
+        with open(path, 'wb') as f:
+            f.writelines(lines)
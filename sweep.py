@@ -0,0 +1,262 @@
+import argparse
+import configparser
+import csv
+import itertools
+import multiprocessing
+import os
+import random
+import re
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import runstore
+from game import Budget, GameState
+
+# Hyperparameter sweeps: every setting of a grid or random search is written as
+# a variant of config.txt and trained headless by main.run in its own process
+# and directory (sweeps/<name>/<job>/). All jobs use the same NEAT seed and the
+# same sequence of courses (GameState.course_rng), so they only differ by their
+# settings. The results of all jobs end up in one table (results.csv).
+
+SWEEP_DIR = "sweeps"
+GENERATIONS = 50
+MAX_TICKS = 5000  # Keeps a job whose dinosaurs never die from running forever
+
+
+def parse_value(text):
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_setting(text):
+    # "KEY=VALUES" -> (KEY, VALUES)
+    key, separator, values = text.partition('=')
+    if not separator or not key.strip():
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUES, got '{text}'")
+    return key.strip(), values.strip()
+
+
+def grid_variants(grid):
+    # grid is a list of (KEY, "V1,V2,...") pairs; every combination is a variant
+    keys = [key for key, _ in grid]
+    values = [[parse_value(value) for value in text.split(',')] for _, text in grid]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def random_variants(ranges, samples, rng):
+    # ranges is a list of (KEY, "LOW:HIGH") pairs, sampled uniformly (as integers
+    # when both bounds are), or (KEY, "V1,V2,...") pairs to choose from
+    variants = []
+    for _ in range(samples):
+        variant = {}
+        for key, text in ranges:
+            if ':' in text:
+                low, high = (parse_value(bound) for bound in text.split(':', 1))
+                if isinstance(low, int) and isinstance(high, int):
+                    variant[key] = rng.randint(low, high)
+                else:
+                    variant[key] = round(rng.uniform(low, high), 6)
+            else:
+                variant[key] = rng.choice([parse_value(value) for value in text.split(',')])
+        variants.append(variant)
+    return variants
+
+
+def set_option(text, key, value):
+    # Replaces the value of `key` ("option" or "Section.option") in the text of a
+    # config file, keeping everything else (comments included) as it is
+    section, _, option = key.rpartition('.')
+    pattern = re.compile(rf"^(\s*{re.escape(option)}\s*=\s*).*$")
+    lines = text.split('\n')
+    current = None
+    matches = []
+    for i, line in enumerate(lines):
+        header = re.match(r"^\s*\[(.+)\]\s*$", line)
+        if header:
+            current = header.group(1).strip()
+        elif pattern.match(line) and (not section or section == current):
+            matches.append(i)
+    if len(matches) != 1:
+        raise ValueError(f"'{key}' matches {len(matches)} options in the config file; "
+                         f"use Section.option")
+    lines[matches[0]] = pattern.sub(lambda match: f"{match.group(1)}{value}", lines[matches[0]])
+    return '\n'.join(lines)
+
+
+def make_jobs(base_path, variants, directory, threshold, args):
+    with open(base_path, encoding='utf-8') as f:
+        base = f.read()
+    jobs = []
+    for i, variant in enumerate(variants):
+        job_dir = os.path.join(directory, f"{i:03d}")
+        os.makedirs(job_dir, exist_ok=True)
+        text = set_option(base, 'fitness_threshold', threshold)  # NEAT stops there
+        for key, value in variant.items():
+            text = set_option(text, key, value)
+        config_path = os.path.join(job_dir, "config.txt")
+        with open(config_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        jobs.append({
+            'id': f"{i:03d}", 'settings': variant, 'directory': job_dir, 'config': config_path,
+            'threshold': threshold, 'generations': args.generations, 'seed': args.seed,
+            'course_seed': args.course_seed, 'max_ticks': args.max_ticks,
+            'skip_idle': args.skip_idle,
+        })
+    return jobs
+
+
+def run_job(job):
+    # Runs in a pool process of its own (maxtasksperchild=1), so GameState
+    # starts from its defaults. The training output goes to train.log.
+    import main
+
+    random.seed(job['seed'])
+    GameState.headless = True
+    GameState.render_every = 0
+    GameState.top_k = None
+    GameState.num_courses = None  # From the variant's [DinoEvaluation]
+    GameState.aggregate = None
+    GameState.fitness_cache_size = main.FITNESS_CACHE_SIZE
+    GameState.skip_idle = job['skip_idle']
+    GameState.course_rng = random.Random(job['course_seed'])
+    if job['max_ticks']:
+        GameState.budget = Budget(max_ticks=job['max_ticks'])
+
+    start = time.perf_counter()
+    error = None
+    with open(os.path.join(job['directory'], "train.log"), 'w') as log, redirect_stdout(log):
+        try:
+            main.run(job['config'], checkpoint_every=0, save_dir=job['directory'],
+                     generations=job['generations'])
+        except Exception as exception:
+            error = f"{type(exception).__name__}: {exception}"
+    return summarize(job, time.perf_counter() - start, error)
+
+
+def summarize(job, seconds, error=None):
+    try:
+        index = runstore.read_index(job['directory'])
+    except FileNotFoundError:
+        index = []
+    best = [entry['best_fitness'] for entry in index if entry['best_fitness'] is not None]
+    reached = next((entry['generation'] for entry in index
+                    if entry['best_fitness'] is not None
+                    and entry['best_fitness'] >= job['threshold']), None)
+    return {
+        'id': job['id'],
+        **job['settings'],
+        'generations_to_threshold': reached,
+        'best_fitness': max(best, default=None),
+        'final_mean_fitness': index[-1]['mean_fitness'] if index else None,
+        'generations': len(index),
+        'seconds': round(seconds, 1),
+        'error': error,
+    }
+
+
+def rank(results):
+    # Jobs that reached the threshold first, soonest first; the others by best fitness
+    return sorted(results, key=lambda result: (
+        result['generations_to_threshold'] is None,
+        result['generations_to_threshold'] or 0,
+        -(result['best_fitness'] or 0),
+    ))
+
+
+def print_table(results, keys):
+    columns = ['id'] + keys + ['generations_to_threshold', 'best_fitness', 'generations', 'seconds']
+    rows = [[format_cell(result.get(column)) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row, result in zip(rows, results):
+        line = "  ".join(cell.rjust(width) for cell, width in zip(row, widths))
+        print(line + (f"  ({result['error']})" if result['error'] else ""))
+
+
+def format_cell(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def save_results(results, keys, path):
+    fields = ['id'] + keys + ['generations_to_threshold', 'best_fitness', 'final_mean_fitness',
+                              'generations', 'seconds', 'error']
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fields)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train config.txt variants side by side")
+    parser.add_argument("--grid", type=parse_setting, action="append", default=[],
+                        metavar="KEY=V1,V2", help="values of an option to try in every combination")
+    parser.add_argument("--random", type=parse_setting, action="append", default=[],
+                        metavar="KEY=LOW:HIGH", help="option to sample uniformly (or KEY=V1,V2 "
+                                                     "to choose from), --samples times")
+    parser.add_argument("--samples", type=int, default=8,
+                        help="number of random variants (with --random)")
+    parser.add_argument("--config", default=None,
+                        help="base config file (default: config.txt next to this script)")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="fitness a job stops at (default: fitness_threshold of the config)")
+    parser.add_argument("--generations", type=int, default=GENERATIONS,
+                        help="most generations per job")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS,
+                        help="end every generation after this many ticks (0 = no limit)")
+    parser.add_argument("--skip-idle", action="store_true",
+                        help="fast-forward idle ticks, as with main.py --skip-idle")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="NEAT seed of every job (and of the random search)")
+    parser.add_argument("--course-seed", type=int, default=0,
+                        help="seed of the course sequence shared by every job")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="jobs trained at the same time")
+    parser.add_argument("--name", default=None,
+                        help=f"sweep directory under {SWEEP_DIR}/ (default: date and time)")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    config_path = args.config or os.path.join(os.path.dirname(__file__), 'config.txt')
+    if args.grid and args.random:
+        raise SystemExit("Use either --grid or --random")
+    if args.grid:
+        variants = grid_variants(args.grid)
+    elif args.random:
+        variants = random_variants(args.random, args.samples, random.Random(args.seed))
+    else:
+        raise SystemExit("Nothing to sweep: give --grid or --random options")
+    keys = [key for key, _ in args.grid or args.random]
+
+    threshold = args.threshold
+    if threshold is None:
+        parser = configparser.ConfigParser()
+        parser.read(config_path, encoding='utf-8')
+        threshold = parser.getfloat('NEAT', 'fitness_threshold')
+
+    directory = os.path.join(SWEEP_DIR, args.name or datetime.now().strftime("%Y%m%d-%H%M%S"))
+    jobs = make_jobs(config_path, variants, directory, threshold, args)
+    print(f"Training {len(jobs)} variants in '{directory}', {args.jobs} at a time")
+
+    results = []
+    with multiprocessing.Pool(min(args.jobs, len(jobs)), maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(run_job, jobs):
+            results.append(result)
+            print(f"  job {result['id']} done in {result['seconds']}s "
+                  f"({len(results)}/{len(jobs)})")
+
+    results = rank(results)
+    print()
+    print_table(results, keys)
+    save_results(results, keys, os.path.join(directory, "results.csv"))
+    print(f"\nResults saved to '{os.path.join(directory, 'results.csv')}'")
@@ -2,46 +2,15 @@ import math
 import random
 import pygame
 import os
-import json
 import neat
 from neat.nn import FeedForwardNetwork
 
-# Initialize pygame
-pygame.init()
-
-# Constants (should match your training constants)
-SCREEN_WIDTH, SCREEN_HEIGHT = 1200, 900
-FPS = 30
-DINO_X_POS, DINO_Y_POS = 80, 310
-JUMP_VELOCITY = 8.5
-BACKGROUND_Y = 380
-INITIAL_GAME_SPEED = 20
-SAVE_DIR = "dino_saves"
-
-SCREEN = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-
-class Assets:
-    @staticmethod
-    def load():
-        Assets.RUNNING = {
-            0: pygame.image.load(os.path.join("Assets/Dino", "DinoRun1.png")),
-            1: pygame.image.load(os.path.join("Assets/Dino", "DinoRun2.png"))
-        }
-        Assets.JUMPING = pygame.image.load(os.path.join("Assets/Dino", "DinoJump.png"))
-        Assets.SMALL_CACTUS = {
-            0: pygame.image.load(os.path.join("Assets/Cactus", "SmallCactus1.png")),
-            1: pygame.image.load(os.path.join("Assets/Cactus", "SmallCactus2.png")),
-            2: pygame.image.load(os.path.join("Assets/Cactus", "SmallCactus3.png"))
-        }
-        Assets.LARGE_CACTUS = {
-            0: pygame.image.load(os.path.join("Assets/Cactus", "LargeCactus1.png")),
-            1: pygame.image.load(os.path.join("Assets/Cactus", "LargeCactus2.png")),
-            2: pygame.image.load(os.path.join("Assets/Cactus", "LargeCactus3.png"))
-        }
-        Assets.BACKGROUND = pygame.image.load(os.path.join("Assets/Other", "Track.png"))
-        Assets.FONT = pygame.font.Font('freesansbold.ttf', 20)
-
-Assets.load()
+import runstore
+from constants import (
+    SCREEN_WIDTH, FPS, DINO_X_POS, DINO_Y_POS, JUMP_VELOCITY, BACKGROUND_Y,
+    INITIAL_GAME_SPEED, SAVE_DIR, SMALL_CACTUS_Y, LARGE_CACTUS_Y,
+)
+from render import FrameRenderer, Assets, get_screen
 
 class Dinosaur:
     def __init__(self, genome=None, config=None):
@@ -84,7 +53,7 @@ class Dinosaur:
     
     def draw(self, SCREEN):
         SCREEN.blit(self.image, (self.rect.x, self.rect.y))
-        pygame.draw.rect(SCREEN, self.color, (self.rect.x, self.rect.y, self.rect.width, self.rect.height), 2)
+        SCREEN.rect(self.color, (self.rect.x, self.rect.y, self.rect.width, self.rect.height), 2)
 
 class Obstacle:
     def __init__(self, image, number_of_cacti):
@@ -103,12 +72,12 @@ class Obstacle:
 class SmallCactus(Obstacle):
     def __init__(self, image, number_of_cacti):
         super().__init__(image, number_of_cacti)
-        self.rect.y = 325
+        self.rect.y = SMALL_CACTUS_Y
 
 class LargeCactus(Obstacle):
     def __init__(self, image, number_of_cacti):
         super().__init__(image, number_of_cacti)
-        self.rect.y = 300
+        self.rect.y = LARGE_CACTUS_Y
 
 def distance(pos_a, pos_b):
     dx = pos_a[0] - pos_b[0]
@@ -126,49 +95,13 @@ def load_best_dino(config_path):
     )
     
     # Find the best generation
-    summary_path = os.path.join(SAVE_DIR, "generations_summary.json")
-    if not os.path.exists(summary_path):
+    if not os.path.exists(os.path.join(SAVE_DIR, "index.jsonl")):
         raise FileNotFoundError("No generations summary found. Train the AI first.")
     
-    with open(summary_path) as f:
-        generations = json.load(f)
-    
-    if not generations:
-        raise ValueError("No generations data available.")
-    
-    # Get the best generation
-    best_gen = max(generations.items(), key=lambda x: x[1]['fitness'])
-    gen_num, best_data = best_gen
-    print(f"Loading best dinosaur from generation {gen_num} with fitness {best_data['fitness']}")
+    gen_num, dino_data = runstore.load_best(SAVE_DIR)
+    print(f"Loading best dinosaur from generation {gen_num} with fitness {dino_data['fitness']}")
     
-    # Load the genome
-    gen_dir = os.path.join(SAVE_DIR, f"gen_{gen_num}")
-    best_dino_path = os.path.join(gen_dir, "best_dino.json")
-    
-    with open(best_dino_path) as f:
-        dino_data = json.load(f)
-    
-    # Recreate the genome
-    genome = neat.DefaultGenome(dino_data['genome_id'])
-    genome.fitness = dino_data['fitness']
-    
-    # Recreate nodes with all attributes
-    for node_data in dino_data['nodes']:
-        node_id = node_data['id']
-        genome.nodes[node_id] = neat.genome.DefaultNodeGene(node_id)
-        genome.nodes[node_id].bias = node_data['bias']
-        genome.nodes[node_id].activation = node_data['activation']
-        genome.nodes[node_id].aggregation = node_data['aggregation']
-        genome.nodes[node_id].response = node_data['response']
-    
-    # Recreate connections
-    for conn_data in dino_data['connections']:
-        key = (conn_data['in'], conn_data['out'])
-        genome.connections[key] = neat.genome.DefaultConnectionGene(key)
-        genome.connections[key].weight = conn_data['weight']
-        genome.connections[key].enabled = conn_data['enabled']
-    
-    return genome, config
+    return runstore.genome_from_record(dino_data), config
 
 def test_best_dino():
     # Load NEAT config
@@ -181,6 +114,9 @@ def test_best_dino():
         print(f"Error loading best dinosaur: {e}")
         return
     
+    # The window is only opened once there is a dinosaur to show
+    SCREEN = get_screen()
+
     # Create the best dinosaur
     best_dino = Dinosaur(genome, config)
     
@@ -193,6 +129,7 @@ def test_best_dino():
     spawn_cooldown = 2000  # ms
     last_spawn_time = 0
     clock = pygame.time.Clock()
+    renderer = FrameRenderer(SCREEN)
     running = True
     
     while running:
@@ -204,7 +141,7 @@ def test_best_dino():
                     best_dino.dino_jump = True
                     best_dino.dino_run = False
         
-        SCREEN.fill((255, 255, 255))
+        renderer.begin_frame()
         
         # Spawn obstacles
         current_time = pygame.time.get_ticks()
@@ -245,26 +182,26 @@ def test_best_dino():
         
         # Draw everything
         for obstacle in obstacles:
-            obstacle.draw(SCREEN)
+            obstacle.draw(renderer)
         
-        best_dino.draw(SCREEN)
+        best_dino.draw(renderer)
         
         # Draw background
         image_width = Assets.BACKGROUND.get_width()
-        SCREEN.blit(Assets.BACKGROUND, (x_pos_bg, y_pos_bg))
-        SCREEN.blit(Assets.BACKGROUND, (image_width + x_pos_bg, y_pos_bg))
+        renderer.blit(Assets.BACKGROUND, (x_pos_bg, y_pos_bg))
+        renderer.blit(Assets.BACKGROUND, (image_width + x_pos_bg, y_pos_bg))
         
         if x_pos_bg <= -image_width:
             x_pos_bg = 0
         x_pos_bg -= game_speed
         
         # Draw UI
-        text_points = Assets.FONT.render(f"Points: {points}", True, (0, 0, 0))
-        text_speed = Assets.FONT.render(f"Speed: {game_speed}", True, (0, 0, 0))
-        SCREEN.blit(text_points, (950, 50))
-        SCREEN.blit(text_speed, (950, 80))
+        text_points = Assets.TEXT.surface('points', f"Points: {points}")
+        text_speed = Assets.TEXT.surface('speed', f"Speed: {game_speed}")
+        renderer.blit(text_points, (950, 50))
+        renderer.blit(text_speed, (950, 80))
         
-        pygame.display.update()
+        renderer.end_frame()
         clock.tick(FPS)
     
     pygame.quit()
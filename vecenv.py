@@ -0,0 +1,183 @@
+import numpy as np
+
+from constants import (
+    SCREEN_WIDTH, INITIAL_GAME_SPEED, DINO_X_POS, DINO_Y_POS, DINO_WIDTH, DINO_HEIGHT,
+    JUMP_VELOCITY, SMALL_CACTUS_SIZES, LARGE_CACTUS_SIZES, SMALL_CACTUS_Y, LARGE_CACTUS_Y,
+)
+from course import SMALL, get_course
+from engine import DinoPopulation
+
+# Many independent games held in arrays, driven with reset(seeds) / step(actions)
+# like a vectorized gym environment. Unlike play_generation, which keeps one
+# episode in GameState, every env has its own course, clock and obstacles, so
+# any number of DinoVecEnv can exist side by side and any controller can play.
+# The rules, arithmetic and order of a tick are those of game.run_episode, so
+# a NEAT network playing an env earns exactly its play_generation fitness
+# (see play_networks).
+
+# Obstacles on screen at most: a spawn needs fewer than 3 and adds up to 3
+SLOTS = 5
+# Distance observed while no obstacle is on screen
+NO_OBSTACLE_DISTANCE = float(SCREEN_WIDTH)
+
+# Sizes and y of every obstacle code (kind * 3 + cactus type, as game.Obstacle.code)
+CODE_WIDTH = np.array([width for width, _ in SMALL_CACTUS_SIZES + LARGE_CACTUS_SIZES])
+CODE_HEIGHT = np.array([height for _, height in SMALL_CACTUS_SIZES + LARGE_CACTUS_SIZES])
+CODE_Y = np.array([SMALL_CACTUS_Y] * 3 + [LARGE_CACTUS_Y] * 3)
+
+
+class DinoVecEnv:
+    # num_envs games, one dinosaur each. Observations are the network inputs of
+    # the game, (rect.y, distance to the first obstacle's midtop), one row per
+    # env. An action is True to jump; it only does something where the dinosaur
+    # is alive and on the ground. `ready` marks the envs in which the game asks
+    # its networks for a decision (alive, on the ground, an obstacle on screen).
+    # Episodes end when the dinosaur dies (terminated) or after max_ticks ticks
+    # (truncated, 0 = never); finished envs stay as they are until reset.
+    def __init__(self, num_envs, max_ticks=0):
+        self.num_envs = num_envs
+        self.max_ticks = max_ticks
+        self.dinosaurs = DinoPopulation(num_envs)
+        self.ticks = np.zeros(num_envs, dtype=np.int64)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.courses = [None] * num_envs
+        self.spawn_index = np.zeros(num_envs, dtype=np.int64)  # Next spawn of each course
+        self.spawn_tick = np.zeros(num_envs, dtype=np.int64)
+        # Obstacles on screen in spawn order; code -1 marks a free slot
+        self.obstacle_x = np.zeros((num_envs, SLOTS), dtype=np.int64)
+        self.obstacle_code = np.full((num_envs, SLOTS), -1, dtype=np.int64)
+        self.ready = np.zeros(num_envs, dtype=bool)
+
+    @property
+    def returns(self):
+        # Total reward of every episode so far (the fitness of the game)
+        return self.dinosaurs.fitness
+
+    @property
+    def done(self):
+        return ~self.dinosaurs.alive | self.truncated
+
+    def reset(self, seeds, rows=None):
+        # Starts new episodes on the courses of seeds, in every env or in the
+        # envs of rows (one seed each), and returns the observations of all envs
+        rows = np.arange(self.num_envs) if rows is None else np.asarray(rows, dtype=np.int64)
+        if len(seeds) != len(rows):
+            raise ValueError(f"Expected {len(rows)} seeds, got {len(seeds)}")
+        dinosaurs = self.dinosaurs
+        dinosaurs.y[rows] = DINO_Y_POS
+        dinosaurs.jump_vel[rows] = JUMP_VELOCITY
+        dinosaurs.dino_run[rows] = True
+        dinosaurs.dino_jump[rows] = False
+        dinosaurs.step_index[rows] = 0
+        dinosaurs.sprite[rows] = 0
+        dinosaurs.alive[rows] = True
+        dinosaurs.fitness[rows] = 0
+        dinosaurs.died_at[rows] = -1
+        dinosaurs.cause[rows] = -1
+        self.ticks[rows] = 0
+        self.truncated[rows] = False
+        self.obstacle_code[rows] = -1
+        for row, seed in zip(rows.tolist(), seeds):
+            self.courses[row] = get_course(seed)
+            self.spawn_index[row] = 0
+            self.spawn_tick[row] = self.courses[row].spawn(0).tick
+
+        active = np.zeros(self.num_envs, dtype=bool)
+        active[rows] = True
+        self._tick(active)
+        return self.observe()
+
+    def step(self, actions):
+        # Applies one action per env and plays the next tick of every unfinished
+        # env. Returns (observations, rewards, terminated, truncated, info) with
+        # info['ready'] as above.
+        dinosaurs = self.dinosaurs
+        playing = dinosaurs.alive & ~self.truncated
+        before = dinosaurs.fitness.copy()
+        dinosaurs.jump(np.asarray(actions, dtype=bool) & playing)
+        dinosaurs.fitness[playing] += 0.1
+        self.ticks[playing] += 1
+        if self.max_ticks:
+            self.truncated |= playing & (self.ticks >= self.max_ticks)
+        self._tick(playing & ~self.truncated)
+        observations = self.observe()
+        return (observations, dinosaurs.fitness - before, ~dinosaurs.alive,
+                self.truncated.copy(), {'ready': self.ready})
+
+    def observe(self):
+        dinosaurs = self.dinosaurs
+        code = self.obstacle_code[:, 0]
+        has_obstacle = code >= 0
+        target = (self.obstacle_x[:, 0] + CODE_WIDTH[code] // 2, CODE_Y[code])
+        observations = dinosaurs.sensors(target, slice(None))
+        observations[~has_obstacle, 1] = NO_OBSTACLE_DISTANCE
+        self.ready = (dinosaurs.alive & ~self.truncated & has_obstacle
+                      & (dinosaurs.y == DINO_Y_POS))
+        return observations
+
+    def _tick(self, active):
+        # The part of a game tick after the decisions, for the envs in the mask
+        # active, at their own tick: move, spawn, move obstacles, collide
+        self.dinosaurs.update(active)
+        self._spawn(active)
+        self._move_obstacles(active)
+        self._collide(active)
+
+    def _spawn(self, active):
+        for row in np.flatnonzero(active & (self.spawn_tick == self.ticks)).tolist():
+            course = self.courses[row]
+            spawn = course.spawn(self.spawn_index[row])
+            used = int(np.count_nonzero(self.obstacle_code[row] >= 0))
+            codes = [spawn.kind * 3 + cactus_type for cactus_type in spawn.types]
+            self.obstacle_x[row, used:used + len(codes)] = SCREEN_WIDTH
+            self.obstacle_code[row, used:used + len(codes)] = codes
+            self.spawn_index[row] += 1
+            self.spawn_tick[row] = course.spawn(self.spawn_index[row]).tick
+
+    def _move_obstacles(self, active):
+        speed = INITIAL_GAME_SPEED + self.ticks // 100
+        self.obstacle_x[active] -= speed[active, None]
+        code = self.obstacle_code
+        gone = (code >= 0) & (self.obstacle_x < -CODE_WIDTH[code]) & active[:, None]
+        if gone.any():
+            # Free the slots and keep the remaining obstacles first, in order
+            code[gone] = -1
+            rows = np.flatnonzero(gone.any(axis=1))
+            order = np.argsort(code[rows] < 0, axis=1, kind='stable')
+            code[rows] = np.take_along_axis(code[rows], order, axis=1)
+            self.obstacle_x[rows] = np.take_along_axis(self.obstacle_x[rows], order, axis=1)
+
+    def _collide(self, active):
+        # Same strict comparisons as DinoPopulation.collide; a dinosaur dies on
+        # the first obstacle (in spawn order) it touches
+        dinosaurs = self.dinosaurs
+        code = self.obstacle_code
+        x, y = self.obstacle_x, CODE_Y[code]
+        dino_y = dinosaurs.y[:, None]
+        hit = ((code >= 0) & (dinosaurs.alive & active)[:, None]
+               & (DINO_X_POS < x + CODE_WIDTH[code]) & (x < DINO_X_POS + DINO_WIDTH)
+               & (dino_y < y + CODE_HEIGHT[code]) & (y < dino_y + DINO_HEIGHT))
+        rows = np.flatnonzero(hit.any(axis=1))
+        if len(rows):
+            dinosaurs.fitness[rows] -= 1
+            dinosaurs.died_at[rows] = self.ticks[rows]
+            dinosaurs.cause[rows] = code[rows, hit[rows].argmax(axis=1)]
+            dinosaurs.alive[rows] = False
+
+
+def play_networks(nets, seeds, max_ticks=0):
+    # Plays every network of a BatchNetwork on every course seed, one env each
+    # (env s * len(nets) + i is network i on seeds[s]), and returns the returns
+    # with shape (len(seeds), len(nets)): the fitness play_generation gives each
+    # genome on each course
+    env = DinoVecEnv(len(nets) * len(seeds), max_ticks)
+    observations = env.reset([seed for seed in seeds for _ in range(len(nets))])
+    networks = np.arange(env.num_envs) % len(nets)
+    actions = np.zeros(env.num_envs, dtype=bool)
+    while not env.done.all():
+        actions[:] = False
+        rows = np.flatnonzero(env.ready)
+        if len(rows):
+            actions[rows] = nets.activate(observations[rows], networks[rows])[:, 0] > 0.5
+        observations, _, _, _, _ = env.step(actions)
+    return env.returns.reshape(len(seeds), -1)
@@ -0,0 +1,60 @@
+import threading
+from collections import deque
+
+import pygame
+
+from constants import FPS
+
+
+class SnapshotBuffer:
+    # Bounded ring buffer of game.Snapshot between the simulation and the render thread. When the
+    # renderer falls behind, the oldest snapshots are overwritten and never drawn.
+    def __init__(self, size=4):
+        self.snapshots = deque(maxlen=size)
+        self.lock = threading.Lock()
+        self.published = 0
+        self.drawn = 0
+
+    def publish(self, snapshot):
+        with self.lock:
+            self.snapshots.append(snapshot)
+            self.published += 1
+
+    def latest(self):
+        # Newest snapshot (or None), dropping everything older
+        with self.lock:
+            if not self.snapshots:
+                return None
+            snapshot = self.snapshots.pop()
+            self.snapshots.clear()
+            self.drawn += 1
+            return snapshot
+
+
+class RenderThread(threading.Thread):
+    # Draws the newest snapshot at a fixed frame rate, independently of how fast
+    # the simulation publishes them. setup() runs on this thread before the first
+    # frame and returns the draw(snapshot) function, so the window is created and
+    # owned by this thread. Closing the window stops the thread.
+    def __init__(self, buffer, setup, fps=FPS):
+        super().__init__(name="RenderThread", daemon=True)
+        self.buffer = buffer
+        self.setup = setup
+        self.fps = fps
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def run(self):
+        draw = self.setup()
+        clock = pygame.time.Clock()
+        while not self.stopped.is_set():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.stopped.set()
+            snapshot = self.buffer.latest()
+            if snapshot is not None:
+                draw(snapshot)
+            clock.tick(self.fps)